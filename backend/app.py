@@ -1,4 +1,5 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
@@ -8,14 +9,68 @@ import random
 import io
 import base64
 import json
+import numbers
+import time
+from fractions import Fraction
+
+from archive import ParetoArchive, TopKLayouts
+from building import Building
+from exact_solver import MAX_EXACT_GRID_CELLS, MAX_EXACT_ROOMS, solve_exact
+from free_space import FreeSpace
+from genetic import solve_genetic
+from hierarchical import solve_hierarchical
+from metrics import ATTEMPT_BUCKETS, SOLVE_BUCKETS, Registry, process_memory
+from objective import Objective
+from profiling import FLOOR_PLAN_PHASES, PhaseProfiler
+from region_index import RegionIndex
+from restart import RestartController
+from sequence_pair import solve_sequence_pair
+from symmetry import Symmetries
+from tabu import TabuSearch
+from tracing import TraceRecorder
+from transposition import TranspositionTable
+from tuning import DEFAULT_PROFILE, profile_for
+
+
+class FloorPlanJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes exact fractional lengths as floats"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Fraction):
+            return float(o)
+        return DefaultJSONProvider.default(o)
 
 
 app = Flask(__name__)
+app.json = FloorPlanJSONProvider(app)
 CORS(app)  # Enable CORS for all routes
 
 
+def exact_length(value):
+    """
+    Convert a length to an exact number.
+
+    Integers are kept as they are and floats become the Fraction of their decimal form
+    (3.45 -> 69/20), so containment, overlap and shared-wall checks never suffer from
+    floating-point error.
+    """
+    if isinstance(value, float):
+        value = Fraction(repr(value))
+    if isinstance(value, Fraction) and value.denominator == 1:
+        return int(value)
+    return value
+
+
+def format_length(value):
+    """Readable form of a length for labels and messages"""
+    return f'{float(value):g}' if isinstance(value, Fraction) else str(value)
+
+
 class Room:
-    def __init__(self, name, width, height, max_expansion=20):
+    def __init__(self, name, width, height, max_expansion=None):
+        width = exact_length(width)
+        height = exact_length(height)
         self.name = name
         self.original_width = width
         self.original_height = height
@@ -24,7 +79,9 @@ class Room:
         self.x = None
         self.y = None
         self.rotated = False
-        self.max_expansion = max_expansion
+        # Without an explicit max_expansion the floor plan's solver profile decides it
+        self.default_expansion = max_expansion is None
+        self.max_expansion = exact_length(DEFAULT_PROFILE['max_expansion'] if max_expansion is None else max_expansion)
 
     def rotate(self):
         self.width, self.height = self.height, self.width
@@ -42,6 +99,12 @@ class Room:
     def get_area(self):
         return self.width * self.height
 
+    def expansion_used(self):
+        """How much of max_expansion the room has grown by, summed over width and height"""
+        if self.rotated:
+            return (self.width - self.original_height) + (self.height - self.original_width)
+        return (self.width - self.original_width) + (self.height - self.original_height)
+
     def to_dict(self):
         """Convert room to dictionary for JSON serialization"""
         return {
@@ -65,32 +128,45 @@ class Room:
 
     def has_shared_wall_with(self, other_room):
         """Check if this room shares a wall with another room"""
+        return self.shared_wall_length(other_room) > 0
+
+    def shared_wall_length(self, other_room):
+        """Length of the wall this room shares with another room (0 when they don't touch)"""
         if self.x is None or self.y is None or other_room.x is None or other_room.y is None:
-            return False
+            return 0
 
         left1, right1, bottom1, top1 = self.get_boundaries()
         left2, right2, bottom2, top2 = other_room.get_boundaries()
 
         # Check for vertical walls
-        if right1 == left2:
-            return max(bottom1, bottom2) < min(top1, top2)
-        if right2 == left1:
-            return max(bottom1, bottom2) < min(top1, top2)
+        if right1 == left2 or right2 == left1:
+            return max(min(top1, top2) - max(bottom1, bottom2), 0)
 
         # Check for horizontal walls
-        if top1 == bottom2:
-            return max(left1, left2) < min(right1, right2)
-        if top2 == bottom1:
-            return max(left1, left2) < min(right1, right2)
+        if top1 == bottom2 or top2 == bottom1:
+            return max(min(right1, right2) - max(left1, left2), 0)
 
-        return False
+        return 0
+
+
+INTEGRAL_SOLVER_ERROR = ('The {} solver needs whole-number dimensions; use the random solver '
+                         'or multiresolution for plans with fractional dimensions')
+GRID_SOLVER_ERROR = ('The {} solver needs a floor grid of at most {} cells, got {}; use the random '
+                     'solver or multiresolution for plans in fine units')
+
+# Largest floor (in unit cells) that gets an anchor grid; beyond it the grid costs gigabytes
+MAX_GRID_CELLS = 4_000_000
 
 
 class FloorPlan:
-    def __init__(self, region_specs):
+    def __init__(self, region_specs, obstacles=None):
         self.rooms = []
         self.adjacency_graph = nx.Graph()
         self.floor_regions = []
+        self.obstacles = []
+        self.objective_settings = {'utilization_weight': 0.0, 'aspect_weight': 0.0, 'max_aspect_ratio': 2.0}
+        self.solve_stats = None
+        self.profiler = None
 
         # Support both formats
         if isinstance(region_specs[0], tuple):
@@ -99,47 +175,141 @@ class FloorPlan:
                 self.floor_regions.append({
                     'x': 0,
                     'y': y_offset,
-                    'width': width,
-                    'height': height
+                    'width': exact_length(width),
+                    'height': exact_length(height)
                 })
-                y_offset += height
+                y_offset += exact_length(height)
         else:
             for region in region_specs:
                 self.floor_regions.append({
-                    'x': region.get('x', 0),
-                    'y': region.get('y', 0),
-                    'width': region['width'],
-                    'height': region['height']
+                    'x': exact_length(region.get('x', 0)),
+                    'y': exact_length(region.get('y', 0)),
+                    'width': exact_length(region['width']),
+                    'height': exact_length(region['height'])
                 })
 
         self.floor_width = max(region['x'] + region['width'] for region in self.floor_regions)
         self.floor_height = max(region['y'] + region['height'] for region in self.floor_regions)
 
-    def add_room(self, name, width, height, max_expansion=20):
+        # Overlapping and touching regions merged into disjoint rectangles, with a fast locator
+        self.region_index = RegionIndex(self.floor_regions)
+
+        for obstacle in obstacles or []:
+            self.add_obstacle(
+                obstacle.get('name', f'Obstacle {len(self.obstacles) + 1}'),
+                obstacle['x'],
+                obstacle['y'],
+                obstacle['width'],
+                obstacle['height']
+            )
+
+    def add_obstacle(self, name, x, y, width, height):
+        """
+        Add a fixed obstacle such as a column, shaft or stair core.
+
+        Obstacles are cut out of the floor itself, so placement, expansion and every solver
+        treat them as unusable floor without checking them per attempt. They are not rooms
+        and don't show up in room statistics.
+        """
+        obstacle = {
+            'name': name,
+            'x': exact_length(x),
+            'y': exact_length(y),
+            'width': exact_length(width),
+            'height': exact_length(height)
+        }
+        self.obstacles.append(obstacle)
+
+        self.region_index = RegionIndex(self.floor_regions, self.obstacles)
+        self._floor_mask = None
+        self._free_space = None
+        return obstacle
+
+    def add_room(self, name, width, height, max_expansion=None):
         room = Room(name, width, height, max_expansion)
         self.rooms.append(room)
         self.adjacency_graph.add_node(name)
         return room
 
-    def add_adjacency(self, room1_name, room2_name):
+    def add_adjacency(self, room1_name, room2_name, weight=1, min_wall_length=0):
+        """
+        Require two rooms to share a wall.
+
+        weight is what the adjacency is worth in the objective, and min_wall_length the
+        shortest shared wall that counts (e.g. the width of a doorway).
+        """
         if room1_name in self.adjacency_graph.nodes and room2_name in self.adjacency_graph.nodes:
-            self.adjacency_graph.add_edge(room1_name, room2_name)
+            self.adjacency_graph.add_edge(room1_name, room2_name, weight=weight,
+                                          min_wall_length=exact_length(min_wall_length))
+
+    def set_objective(self, utilization_weight=0.0, aspect_weight=0.0, max_aspect_ratio=2.0):
+        """Configure the utilization and aspect-ratio terms of the layout objective"""
+        self.objective_settings = {
+            'utilization_weight': utilization_weight,
+            'aspect_weight': aspect_weight,
+            'max_aspect_ratio': max_aspect_ratio
+        }
+
+    def compile_objective(self):
+        """Compile the layout objective into arrays for the current rooms and adjacencies"""
+        objective = Objective(self, **self.objective_settings)
+        if self.profiler is not None:
+            self.profiler.instrument(objective, 'evaluate_rooms', 'scoring')
+        return objective
+
+    def enable_profiling(self):
+        """Start counting and timing solver phases (see PhaseProfiler); returns the profiler"""
+        if self.profiler is None:
+            PhaseProfiler().attach(self)
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop profiling and return the PerfReport, or None when profiling was off"""
+        if self.profiler is None:
+            return None
+        return self.profiler.detach()
+
+    def __getstate__(self):
+        # Profiling wrappers are closures and don't survive pickling into worker processes
+        state = dict(self.__dict__)
+        for method_name, _, _ in FLOOR_PLAN_PHASES:
+            state.pop(method_name, None)
+        state['profiler'] = None
+        return state
+
+    def evaluate_objective(self):
+        return self.compile_objective().evaluate_rooms()
+
+    def is_integral(self):
+        """Check if every floor and room length is a whole number, as the grid-based solvers need"""
+        lengths = [rect[key] for rect in self.floor_regions + self.obstacles for key in ('x', 'y', 'width', 'height')]
+        lengths += [length for room in self.rooms for length in (room.original_width, room.original_height)]
+        return all(isinstance(length, numbers.Integral) for length in lengths)
+
+    def _require_integral(self, solver):
+        if not self.is_integral():
+            raise ValueError(INTEGRAL_SOLVER_ERROR.format(solver))
+
+    def grid_cells(self):
+        """Number of unit cells in the bounding box of the floor, i.e. the size of its anchor grid"""
+        origin_x = min(region['x'] for region in self.floor_regions)
+        origin_y = min(region['y'] for region in self.floor_regions)
+        return (self.floor_width - origin_x) * (self.floor_height - origin_y)
+
+    def has_anchor_grid(self):
+        """Check if the floor can be rasterized into an anchor grid (whole numbers, at most MAX_GRID_CELLS)"""
+        return self.is_integral() and self.grid_cells() <= MAX_GRID_CELLS
+
+    def _require_grid(self, solver):
+        self._require_integral(solver)
+        if self.grid_cells() > MAX_GRID_CELLS:
+            raise ValueError(GRID_SOLVER_ERROR.format(solver, MAX_GRID_CELLS, self.grid_cells()))
 
     def is_within_floor(self, x, y, width, height):
-        for dx in range(width):
-            for dy in range(height):
-                px = x + dx
-                py = y + dy
-                if not self.point_in_floor(px, py):
-                    return False
-        return True
+        return self.region_index.contains_rect(x, y, width, height)
 
     def point_in_floor(self, x, y):
-        for region in self.floor_regions:
-            if (region['x'] <= x < region['x'] + region['width'] and
-                    region['y'] <= y < region['y'] + region['height']):
-                return True
-        return False
+        return self.region_index.contains_point(x, y)
 
     def check_overlap(self, room, x, y, width, height):
         for existing_room in self.rooms:
@@ -155,185 +325,1019 @@ class FloorPlan:
         score = 0
         adjacent_pairs = []
 
-        for room1_name, room2_name in self.adjacency_graph.edges:
+        for room1_name, room2_name, data in self.adjacency_graph.edges(data=True):
             room1 = next(r for r in self.rooms if r.name == room1_name)
             room2 = next(r for r in self.rooms if r.name == room2_name)
 
             if room1.x is None or room2.x is None:
                 continue
 
-            if room1.has_shared_wall_with(room2):
+            wall_length = room1.shared_wall_length(room2)
+            if wall_length > 0 and wall_length >= data.get('min_wall_length', 0):
                 score += 1
                 adjacent_pairs.append((room1_name, room2_name))
 
         return score, adjacent_pairs
 
-    def can_expand_room(self, room, direction, amount):
-        if room.x is None or room.y is None:
-            return False
+    def weighted_adjacency_score(self):
+        """Summed weight of the satisfied adjacencies, the score the exact, tabu and sequence-pair solvers use"""
+        return sum(self.adjacency_graph[u][v].get('weight', 1) for u, v in self.evaluate_adjacency_score()[1])
+
+    def expansion_limit(self, room, direction):
+        """
+        Largest amount a placed room can grow in a direction without exceeding its
+        max_expansion, overlapping another room or leaving the floor.
+
+        Computed from rectangle edges rather than by growing one unit at a time, so it
+        works the same for fractional dimensions.
+        """
+        limit = room.max_expansion - room.expansion_used()
+        if limit <= 0:
+            return 0
+
+        left, right, bottom, top = room.get_boundaries()
+        horizontal = direction in ('right', 'left')
+
+        def distance(near, far):
+            """Distance from the growing wall to an edge, positive when the edge lies ahead"""
+            if direction == 'right':
+                return near - right
+            if direction == 'left':
+                return left - far
+            if direction == 'up':
+                return near - top
+            return bottom - far
+
+        # Rooms in the way stop the growth at their nearest edge
+        for other in self.rooms:
+            if other is room or other.x is None:
+                continue
+            o_left, o_right, o_bottom, o_top = other.get_boundaries()
+            if horizontal and o_bottom < top and o_top > bottom:
+                gap = distance(o_left, o_right)
+            elif not horizontal and o_left < right and o_right > left:
+                gap = distance(o_bottom, o_top)
+            else:
+                continue
+            if gap >= 0:
+                limit = min(limit, gap)
+
+        # The strip added by growing only loses floor cover as it gets longer, and can only
+        # start to leave the floor at a region edge
+        edges = {limit}
+        for region in self.region_index.rects:
+            if horizontal:
+                ends = (region['x'], region['x'] + region['width'])
+            else:
+                ends = (region['y'], region['y'] + region['height'])
+            for end in ends:
+                gap = distance(end, end)
+                if 0 < gap < limit:
+                    edges.add(gap)
+
+        def strip(amount):
+            if direction == 'right':
+                return right, bottom, amount, top - bottom
+            if direction == 'left':
+                return left - amount, bottom, amount, top - bottom
+            if direction == 'up':
+                return left, top, right - left, amount
+            return left, bottom - amount, right - left, amount
+
+        reachable = 0
+        for amount in sorted(edges):
+            if not self.is_within_floor(*strip(amount)):
+                break
+            reachable = amount
+        return reachable
 
-        # Check expansion limits
-        current_expansion = 0
-        if not room.rotated:
-            current_expansion += room.width - room.original_width
-            current_expansion += room.height - room.original_height
-        else:
-            current_expansion += room.width - room.original_height
-            current_expansion += room.height - room.original_width
+    def expand_rooms(self):
+        for room in self.rooms:
+            if room.x is None or room.y is None:
+                continue
+
+            directions = ['right', 'down', 'left', 'up']
+            random.shuffle(directions)
+
+            for direction in directions:
+                amount = self.expansion_limit(room, direction)
+                if direction == 'right':
+                    room.width += amount
+                elif direction == 'left':
+                    room.x -= amount
+                    room.width += amount
+                elif direction == 'up':
+                    room.height += amount
+                elif direction == 'down':
+                    room.y -= amount
+                    room.height += amount
+
+    def _get_floor_mask(self):
+        """Boolean occupancy grid of the floor (rows are y, columns are x) and its summed-area table"""
+        if getattr(self, '_floor_mask', None) is None:
+            origin_x = min(region['x'] for region in self.floor_regions)
+            origin_y = min(region['y'] for region in self.floor_regions)
+            mask = np.zeros((self.floor_height - origin_y, self.floor_width - origin_x), dtype=bool)
+
+            for region in self.floor_regions:
+                left = region['x'] - origin_x
+                bottom = region['y'] - origin_y
+                mask[bottom:bottom + region['height'], left:left + region['width']] = True
+
+            for obstacle in self.obstacles:
+                # Clamp to the grid: a negative slice end would count from the far side
+                left = max(obstacle['x'] - origin_x, 0)
+                bottom = max(obstacle['y'] - origin_y, 0)
+                right = max(obstacle['x'] - origin_x + obstacle['width'], 0)
+                top = max(obstacle['y'] - origin_y + obstacle['height'], 0)
+                if left < right and bottom < top:
+                    mask[bottom:top, left:right] = False
+
+            summed = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+            summed[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+
+            self._floor_mask = mask
+            self._floor_summed_area = summed
+            self._floor_origin = (origin_x, origin_y)
+
+        return self._floor_mask, self._floor_summed_area, self._floor_origin
+
+    def compute_anchors(self, width, height):
+        """
+        Find every bottom-left position where a width x height room lies fully inside the floor.
+
+        Returns (indices, stride): a compact int32 array of flat anchor indices and the row
+        stride needed to decode them with anchor_to_position.
+        """
+        mask, summed, _ = self._get_floor_mask()
+        rows, cols = mask.shape
+
+        if width <= 0 or height <= 0 or width > cols or height > rows:
+            return np.empty(0, dtype=np.int32), max(cols - width + 1, 1)
+
+        # Floor cells covered by the room for every possible anchor, read off the summed-area table
+        covered = (summed[height:, width:] - summed[:rows + 1 - height, width:] -
+                   summed[height:, :cols + 1 - width] + summed[:rows + 1 - height, :cols + 1 - width])
+        indices = np.flatnonzero(covered == width * height).astype(np.int32)
+
+        return indices, cols + 1 - width
+
+    def anchor_to_position(self, index, stride):
+        origin_x, origin_y = self._get_floor_mask()[2]
+        row, col = divmod(int(index), stride)
+        return origin_x + col, origin_y + row
+
+    def compute_anchor_sets(self):
+        """Valid anchors for every room, keyed by room name and then by rotation flag"""
+        by_size = {}
+        anchor_sets = {}
 
-        if current_expansion + amount > room.max_expansion:
+        for room in self.rooms:
+            orientations = {
+                False: (room.original_width, room.original_height),
+                True: (room.original_height, room.original_width)
+            }
+            anchor_sets[room.name] = {}
+            for rotated, size in orientations.items():
+                if size not in by_size:
+                    by_size[size] = self.compute_anchors(*size)
+                anchor_sets[room.name][rotated] = by_size[size]
+
+        return anchor_sets
+
+    def _place_from_anchors(self, room, anchors, tries, controller=None):
+        """Try to place a room at one of its precomputed anchors, reporting the tries to controller"""
+        indices, stride = anchors
+        if len(indices) == 0:
             return False
 
-        # Calculate new dimensions
-        new_x, new_y = room.x, room.y
-        new_width, new_height = room.width, room.height
-
-        if direction == 'right':
-            new_width += amount
-        elif direction == 'left':
-            new_x -= amount
-            new_width += amount
-        elif direction == 'up':
-            new_height += amount
-        elif direction == 'down':
-            new_y -= amount
-            new_height += amount
+        if len(indices) <= tries:
+            # Few enough candidates to check every one of them in random order
+            candidates = random.sample(range(len(indices)), len(indices))
         else:
-            return False
+            candidates = (random.randrange(len(indices)) for _ in range(tries))
 
-        if not self.is_within_floor(new_x, new_y, new_width, new_height):
-            return False
+        used = 0
+        for candidate in candidates:
+            used += 1
+            x, y = self.anchor_to_position(indices[candidate], stride)
+            if not self.check_overlap(room, x, y, room.width, room.height):
+                room.x = x
+                room.y = y
+                if controller is not None:
+                    controller.record_sampling(used, True)
+                return True
 
-        if self.check_overlap(room, new_x, new_y, new_width, new_height):
-            return False
+        if controller is not None:
+            controller.record_sampling(used, False)
+        return False
 
-        return True
+    @staticmethod
+    def _union_area(rects):
+        """Area covered by a list of (x, y, width, height) rectangles, counting overlaps once"""
+        rects = [r for r in rects if r[2] > 0 and r[3] > 0]
+        if not rects:
+            return 0
+
+        xs = sorted(set([r[0] for r in rects] + [r[0] + r[2] for r in rects]))
+        ys = sorted(set([r[1] for r in rects] + [r[1] + r[3] for r in rects]))
+
+        area = 0
+        for i in range(len(xs) - 1):
+            for j in range(len(ys) - 1):
+                cx, cy = xs[i], ys[j]
+                for rx, ry, rw, rh in rects:
+                    if rx <= cx < rx + rw and ry <= cy < ry + rh:
+                        area += (xs[i + 1] - cx) * (ys[j + 1] - cy)
+                        break
+        return area
+
+    def _region_rects(self, indices=None):
+        if indices is None:
+            indices = range(len(self.floor_regions))
+        return [(self.floor_regions[i]['x'], self.floor_regions[i]['y'],
+                 self.floor_regions[i]['width'], self.floor_regions[i]['height']) for i in indices]
+
+    def _covered_area(self, x, y, width, height, indices=None):
+        """Area of the given rectangle that lies on the floor (optionally restricted to some regions)"""
+        if indices is None:
+            return self.region_index.covered_area(x, y, width, height)
+
+        clipped = []
+        for rx, ry, rw, rh in self._region_rects(indices):
+            left, right = max(x, rx), min(x + width, rx + rw)
+            bottom, top = max(y, ry), min(y + height, ry + rh)
+            if left < right and bottom < top:
+                clipped.append((left, bottom, right - left, top - bottom))
+        return self._union_area(clipped)
+
+    def _floor_components(self):
+        """Group floor regions that overlap or share a wall into connected components"""
+        graph = nx.Graph()
+        graph.add_nodes_from(range(len(self.floor_regions)))
+
+        for i, a in enumerate(self.floor_regions):
+            for j in range(i + 1, len(self.floor_regions)):
+                b = self.floor_regions[j]
+                x_overlap = min(a['x'] + a['width'], b['x'] + b['width']) - max(a['x'], b['x'])
+                y_overlap = min(a['y'] + a['height'], b['y'] + b['height']) - max(a['y'], b['y'])
+                # Touching at a corner does not connect two regions
+                if (x_overlap >= 0 and y_overlap > 0) or (x_overlap > 0 and y_overlap >= 0):
+                    graph.add_edge(i, j)
+
+        return [sorted(component) for component in nx.connected_components(graph)]
+
+    def _fits_in_component(self, width, height, component):
+        """Check if a width x height rectangle fits somewhere inside a floor component"""
+        rects = self._region_rects(component)
+
+        # Cheap case: the rectangle fits inside a single region
+        if not self.obstacles:
+            for _, _, rw, rh in rects:
+                if rw >= width and rh >= height:
+                    return True
 
-    def expand_rooms(self):
+        # A rectangle that fits in a rectilinear union can be slid left and down until
+        # it touches region or obstacle edges, so only edge coordinates need to be checked
+        xs = set()
+        ys = set()
+        for rx, ry, rw, rh in rects:
+            xs.update((rx, rx + rw - width))
+            ys.update((ry, ry + rh - height))
+        for obstacle in self.obstacles:
+            xs.add(obstacle['x'] + obstacle['width'])
+            ys.add(obstacle['y'] + obstacle['height'])
+
+        for x in xs:
+            for y in ys:
+                if self._covered_area(x, y, width, height, component) == width * height and \
+                        (not self.obstacles or self.is_within_floor(x, y, width, height)):
+                    return True
+        return False
+
+    def _obstacle_area(self, component):
+        """Floor area of a component taken up by obstacles"""
+        clipped = []
+        for rx, ry, rw, rh in self._region_rects(component):
+            for obstacle in self.obstacles:
+                left, right = max(rx, obstacle['x']), min(rx + rw, obstacle['x'] + obstacle['width'])
+                bottom, top = max(ry, obstacle['y']), min(ry + rh, obstacle['y'] + obstacle['height'])
+                if left < right and bottom < top:
+                    clipped.append((left, bottom, right - left, top - bottom))
+        return self._union_area(clipped)
+
+    def solver_profile(self):
+        """Tuned solver parameters for this problem's size class, see tuning.profile_for"""
+        return profile_for(len(self.rooms), self.region_index.area)
+
+    def apply_solver_profile(self, profile=None):
+        """Give rooms without an explicit max_expansion the profile's value and return the profile"""
+        profile = profile or self.solver_profile()
         for room in self.rooms:
-            if room.x is None or room.y is None:
-                continue
+            if room.default_expansion:
+                room.max_expansion = exact_length(profile['max_expansion'])
+        return profile
+
+    def analyze_symmetries(self):
+        """Find square rooms and interchangeable rooms, see Symmetries"""
+        return Symmetries(self)
+
+    def analyze_feasibility(self):
+        """
+        Run cheap necessary checks before searching for a layout.
+
+        Returns a report dictionary with 'feasible' set to False when the rooms can
+        provably not be placed, and a list of 'issues' explaining why.
+        """
+        issues = []
+        components = self._floor_components()
+        component_areas = [self._union_area(self._region_rects(c)) - self._obstacle_area(c) for c in components]
+        floor_area = sum(component_areas)
+        room_area = sum(room.original_width * room.original_height for room in self.rooms)
+
+        # Area lower bound: rooms can only grow, never shrink
+        if room_area > floor_area:
+            issues.append({
+                'type': 'area_exceeded',
+                'message': f'Total room area {format_length(room_area)} exceeds floor area '
+                           f'{format_length(floor_area)}',
+                'room_area': room_area,
+                'floor_area': floor_area
+            })
 
-            directions = ['right', 'down', 'left', 'up']
-            random.shuffle(directions)
+        # Per-room fit in either orientation
+        room_components = {}
+        for room in self.rooms:
+            fitting = [
+                index for index, component in enumerate(components)
+                if self._fits_in_component(room.original_width, room.original_height, component) or
+                self._fits_in_component(room.original_height, room.original_width, component)
+            ]
+            room_components[room.name] = fitting
+
+            if not fitting:
+                issues.append({
+                    'type': 'room_does_not_fit',
+                    'message': f'Room {room.name} '
+                               f'({format_length(room.original_width)}x{format_length(room.original_height)}) '
+                               f'does not fit anywhere on the floor in either orientation',
+                    'room': room.name
+                })
 
-            for direction in directions:
-                expanded = True
-                while expanded:
-                    if self.can_expand_room(room, direction, 1):
-                        if direction == 'right':
-                            room.width += 1
-                        elif direction == 'left':
-                            room.x -= 1
-                            room.width += 1
-                        elif direction == 'up':
-                            room.height += 1
-                        elif direction == 'down':
-                            room.y -= 1
-                            room.height += 1
-                    else:
-                        expanded = False
+        # Bin-packing bound: the rooms that can only go into a set of components
+        # must not need more area than those components provide
+        if len(components) > 1:
+            subsets = range(1, 2 ** len(components)) if len(components) <= 12 else \
+                [1 << index for index in range(len(components))]
+            for mask in subsets:
+                members = [index for index in range(len(components)) if mask & (1 << index)]
+                if len(members) == len(components):
+                    continue  # Already covered by the area lower bound
+
+                confined = [
+                    room for room in self.rooms
+                    if room_components[room.name] and all(mask & (1 << c) for c in room_components[room.name])
+                ]
+                needed = sum(room.original_width * room.original_height for room in confined)
+                available = sum(component_areas[index] for index in members)
+
+                if needed > available:
+                    issues.append({
+                        'type': 'component_overfull',
+                        'message': f'Rooms {[room.name for room in confined]} need area {format_length(needed)} '
+                                   f'but only fit in floor components {members} with area '
+                                   f'{format_length(available)}',
+                        'components': members,
+                        'rooms': [room.name for room in confined],
+                        'room_area': needed,
+                        'component_area': available
+                    })
+
+        return {
+            'feasible': not issues,
+            'floor_area': floor_area,
+            'room_area': room_area,
+            'components': [
+                {'regions': component, 'area': area}
+                for component, area in zip(components, component_areas)
+            ],
+            'issues': issues
+        }
+
+    def _free_space_for_placed_rooms(self):
+        """Free-space tracker for the floor with all currently placed rooms carved out"""
+        free_space = self._get_free_space().copy()
+        for room in self.rooms:
+            if room.x is not None:
+                free_space.occupy(room.x, room.y, room.width, room.height)
+        return free_space
+
+    def _get_free_space(self):
+        if getattr(self, '_free_space', None) is None:
+            self._free_space = FreeSpace(self.region_index.rects)
+        return self._free_space
+
+    def _place_with_heuristic(self, room, free_space, heuristic):
+        """
+        Place a room directly into a free rectangle, trying both orientations.
+
+        heuristic is one of FreeSpace.HEURISTICS, or 'random' to take a random corner of a
+        random free rectangle that fits.
+        """
+        # Rotating a square room changes nothing
+        for _ in range(1 if room.width == room.height else 2):
+            if heuristic == 'random':
+                position = free_space.sample_position(room.width, room.height)
+            else:
+                position = free_space.find_position(room.width, room.height, heuristic)
+            if position is not None:
+                room.x, room.y = position
+                return True
+            room.rotate()
+        return False
+
+    @staticmethod
+    def _expansion_can_connect(room1, room2, allow_expansion=True):
+        """
+        Optimistic check whether two placed rooms share a wall or could after expansion.
+
+        Counts the growth needed to close the gap between them and to make their walls
+        overlap, and compares it with what is left of both rooms' max_expansion. Other
+        rooms and the floor outline are ignored, so this never rules out a reachable wall.
+        Walls must overlap by more than zero, so a gap along the wall needs strictly more
+        growth than its length.
+        """
+        x_gap = max(room2.x - (room1.x + room1.width), room1.x - (room2.x + room2.width))
+        y_gap = max(room2.y - (room1.y + room1.height), room1.y - (room2.y + room2.height))
+
+        needed = []
+        if x_gap >= 0:
+            needed.append((x_gap + max(y_gap, 0), y_gap >= 0))
+        if y_gap >= 0:
+            needed.append((y_gap + max(x_gap, 0), x_gap >= 0))
+        if not needed:
+            return False  # Overlapping rooms
+
+        budget = 0
+        for room in (room1, room2) if allow_expansion else ():
+            budget += max(room.max_expansion - room.expansion_used(), 0)
+
+        return any(growth < budget if strict else growth <= budget for growth, strict in needed)
+
+    def place_rooms_with_constraints(self, max_attempts=None, enable_expansion=True, placement='random',
+                                     archives=(), transposition_size=4096, stagnation_window=0, profile=None,
+                                     trace=None):
+        """Place rooms respecting floor shape and adjacencies over many attempts; stats end up in solve_stats"""
+        if placement != 'random' and placement not in FreeSpace.HEURISTICS:
+            raise ValueError(f"Unknown placement '{placement}'")
+
+        start_time = time.perf_counter()
+        profile = self.apply_solver_profile(profile)
+        if max_attempts is None:
+            max_attempts = profile['max_attempts']
+        self.solve_stats = {'attempts': 0, 'complete_layouts': 0, 'duplicates_skipped': 0,
+                            'profile': profile.get('size_class'), 'first_complete_seconds': None,
+                            'best_seconds': None}
+        if trace is not None:
+            trace.begin('place_rooms_with_constraints', 'solve', rooms=len(self.rooms), max_attempts=max_attempts)
+
+        # Don't burn attempts on a problem that can never be solved
+        if not self.analyze_feasibility()['feasible']:
+            for room in self.rooms:
+                room.x = None
+                room.y = None
+            if trace is not None:
+                trace.end(outcome='infeasible')
+            return False
 
-    def place_rooms_with_constraints(self, max_attempts=1000, enable_expansion=True):
         sorted_rooms = sorted(self.rooms, key=lambda r: r.get_area(), reverse=True)
-        best_score = -1
+        objective = self.compile_objective()
+        best_value = float('-inf')
         best_placement = None
+        seen = TranspositionTable(transposition_size) if transposition_size else None
+        symmetries = self.analyze_symmetries()
+
+        # Valid anchors only depend on the floor and room sizes, so compute them once per solve;
+        # plans with fractional dimensions or too many cells have no anchor grid and sample
+        # free rectangles instead
+        anchor_sets = self.compute_anchor_sets() if self.has_anchor_grid() else None
+        controller = RestartController(profile['tries_per_region'] * len(self.floor_regions), stagnation_window)
+
+        rooms_by_name = {room.name: room for room in self.rooms}
+        neighbours = {
+            room.name: [rooms_by_name[name] for name in self.adjacency_graph.neighbors(room.name)]
+            for room in self.rooms
+        }
 
         for attempt in range(max_attempts):
+            if controller.should_stop():
+                break
+            self.solve_stats['attempts'] += 1
+            if trace is not None:
+                trace.begin('attempt', 'attempt', index=attempt)
+
             # Reset placements
             for room in self.rooms:
                 room.x = None
                 room.y = None
                 room.reset_to_original_size()
-                if random.random() > 0.5:
+                if room.name not in symmetries.square and random.random() < profile['rotation_probability']:
                     room.rotate()
 
+            # Value an attempt has to beat to be worth finishing
+            cutoff = min([best_value] + [archive.threshold() for archive in archives])
+
             # Try to place all rooms
             all_placed = True
+            hopeless = False
+            lost_weight = 0
+            free_space = self._get_free_space().copy() if placement != 'random' or anchor_sets is None else None
             for room in sorted_rooms:
-                placed = False
+                if trace is not None:
+                    trace.begin('place room', 'placement', room=room.name)
+
+                if placement == 'random' and anchor_sets is None:
+                    placed = self._place_with_heuristic(room, free_space, 'random')
+                elif placement == 'random':
+                    placed = self._place_from_anchors(room, anchor_sets[room.name][room.rotated],
+                                                      controller.sample_budget, controller)
+
+                    if not placed and room.name not in symmetries.square:
+                        room.rotate()
+                        placed = self._place_from_anchors(room, anchor_sets[room.name][room.rotated],
+                                                      controller.sample_budget, controller)
+
+                    if not placed:
+                        # Sampling missed, but free space may still exist: look it up directly
+                        if free_space is None:
+                            free_space = self._free_space_for_placed_rooms()
+                        placed = self._place_with_heuristic(room, free_space, 'best_short_side_fit')
+                else:
+                    placed = self._place_with_heuristic(room, free_space, placement)
 
-                for region in self.floor_regions:
-                    if region['width'] < room.width or region['height'] < room.height:
-                        continue
+                if trace is not None:
+                    trace.end(placed=placed)
 
-                    for _ in range(100):
-                        max_x = region['x'] + region['width'] - room.width
-                        max_y = region['y'] + region['height'] - room.height
+                if not placed:
+                    all_placed = False
+                    break
 
-                        if max_x >= region['x'] and max_y >= region['y']:
-                            x = random.randint(region['x'], max_x)
-                            y = random.randint(region['y'], max_y)
+                if free_space is not None:
+                    free_space.occupy(room.x, room.y, room.width, room.height)
 
-                            if not self.check_overlap(room, x, y, room.width, room.height):
-                                room.x = x
-                                room.y = y
-                                placed = True
-                                break
+                # Edges to placed neighbours that even full expansion can't close are lost for good;
+                # give up on the attempt once it can no longer beat the best objective value
+                lost_weight += sum(
+                    max(self.adjacency_graph[room.name][other.name].get('weight', 1), 0)
+                    for other in neighbours[room.name]
+                    if other.x is not None and not self._expansion_can_connect(room, other, enable_expansion)
+                )
+                if objective.max_value - lost_weight <= cutoff:
+                    hopeless = True
+                    break
 
-                    if placed:
-                        break
+            if not all_placed or hopeless:
+                controller.record_attempt(False, False)
+                if trace is not None:
+                    trace.end_until('attempt', outcome='pruned' if hopeless else 'incomplete')
+                continue
 
-                if not placed:
+            self.solve_stats['complete_layouts'] += 1
+            if self.solve_stats['first_complete_seconds'] is None:
+                self.solve_stats['first_complete_seconds'] = round(time.perf_counter() - start_time, 4)
+            if seen is not None:
+                key = TranspositionTable.fingerprint(self.rooms, symmetries)
+                if seen.lookup(key) is not None:
+                    self.solve_stats['duplicates_skipped'] += 1
+                    controller.record_attempt(True, False)
+                    if trace is not None:
+                        trace.end_until('attempt', outcome='duplicate')
+                    continue
+
+            if enable_expansion:
+                if trace is not None:
+                    trace.begin('expand rooms', 'expansion')
+                self.expand_rooms()
+                if trace is not None:
+                    trace.end()
+
+            if trace is not None:
+                trace.begin('score', 'scoring')
+            value = objective.evaluate_rooms()
+            if trace is not None:
+                trace.end(value=value)
+            if seen is not None:
+                seen.store(key, value)
+
+            improved = value > best_value
+            if improved:
+                best_value = value
+                best_placement = self.snapshot_placement()
+                self.solve_stats['best_seconds'] = round(time.perf_counter() - start_time, 4)
+                if trace is not None:
+                    trace.instant('new best', 'solve', value=value, attempt=attempt)
+                    trace.counter('best value', value=value)
+
+            for archive in archives:
+                improved = archive.offer(self, value) or improved
+            controller.record_attempt(True, improved)
+            if trace is not None:
+                trace.end_until('attempt', outcome='improved' if improved else 'evaluated', value=value)
+
+            # Stop as soon as the objective is saturated
+            if min([value] + [archive.threshold() for archive in archives]) >= objective.max_value:
+                break
+
+        self.solve_stats.update(controller.report())
+        self.solve_stats['elapsed_seconds'] = round(time.perf_counter() - start_time, 4)
+        if trace is not None:
+            trace.end_until('place_rooms_with_constraints', outcome='placed' if best_placement else 'unplaced',
+                            best_value=best_value if best_placement else None)
+
+        # Restore best placement
+        if best_placement:
+            self.apply_placement(best_placement)
+            return True
+
+        return all_placed
+
+    def snapshot_placement(self):
+        """Capture room positions and sizes as a list of tuples"""
+        return [
+            (room.name, room.x, room.y, room.width, room.height, room.rotated, room.max_expansion)
+            for room in self.rooms]
+
+    def apply_placement(self, placement):
+        """Restore room positions and sizes captured by snapshot_placement"""
+        for room_data in placement:
+            name, x, y, width, height, rotated, max_expansion = room_data
+            room = next(r for r in self.rooms if r.name == name)
+            room.x = x
+            room.y = y
+            room.width = width
+            room.height = height
+            room.rotated = rotated
+            room.max_expansion = max_expansion
+
+    def legalize_placement(self, rects, rotations, order=None):
+        """
+        Apply candidate (x, y, width, height) rectangles, one per room, and make them legal.
+
+        Rooms are taken in the given order of indices (default: room order). A room keeps its
+        rectangle when it lies on the floor without overlapping rooms kept before it; otherwise
+        it is moved into free space once all the other rooms are in. When the moved rooms don't
+        fit there, each one is moved as soon as its turn in the order comes instead, before
+        later rooms take up the space, and as a last resort every room is packed into the
+        empty floor largest first. Returns the names of moved rooms, or None (with all rooms
+        unplaced) when some room can't be fitted.
+        """
+        if order is None:
+            order = range(len(self.rooms))
+        order = list(order)
+        by_area = sorted(order, key=lambda index: self.rooms[index].get_area(), reverse=True)
+
+        for pass_order, keep_rects, defer_misfits in ((order, True, True), (order, True, False),
+                                                      (by_area, False, False)):
+            for room, rotated in zip(self.rooms, rotations):
+                room.x = None
+                room.y = None
+                room.rotated = False
+                room.reset_to_original_size()
+                if rotated:
                     room.rotate()
-                    for region in self.floor_regions:
-                        if region['width'] < room.width or region['height'] < room.height:
-                            continue
 
-                        for _ in range(100):
-                            max_x = region['x'] + region['width'] - room.width
-                            max_y = region['y'] + region['height'] - room.height
+            moved = self._fit_rects(rects, pass_order, keep_rects, defer_misfits)
+            if moved is not None:
+                return moved
 
-                            if max_x >= region['x'] and max_y >= region['y']:
-                                x = random.randint(region['x'], max_x)
-                                y = random.randint(region['y'], max_y)
+        for room in self.rooms:
+            room.x = None
+            room.y = None
+        return None
+
+    def _fit_rects(self, rects, order, keep_rects, defer_misfits):
+        """One pass of legalize_placement; returns the names of moved rooms or None"""
+        free_space = self._get_free_space().copy()
+
+        def fit(room):
+            if not self._place_with_heuristic(room, free_space, 'best_short_side_fit'):
+                return False
+            free_space.occupy(room.x, room.y, room.width, room.height)
+            return True
 
-                                if not self.check_overlap(room, x, y, room.width, room.height):
-                                    room.x = x
-                                    room.y = y
-                                    placed = True
-                                    break
+        misfits = []
+        for index in order:
+            room = self.rooms[index]
+            x, y, width, height = rects[index]
+            if keep_rects and self.is_within_floor(x, y, width, height) and \
+                    not self.check_overlap(room, x, y, width, height):
+                room.x, room.y = x, y
+                free_space.occupy(x, y, width, height)
+                continue
+            misfits.append(room)
+            if not defer_misfits and not fit(room):
+                return None
+
+        if defer_misfits:
+            for room in sorted(misfits, key=lambda r: r.get_area(), reverse=True):
+                if not fit(room):
+                    return None
+
+        return [room.name for room in misfits]
+
+    def suggest_resolution_factor(self, target_cells=40, max_waste=0.05):
+        """
+        Downscale factor that brings the floor to about target_cells per side, without
+        shrinking any room side below one coarse cell.
+
+        Coarse rooms round up and the coarse floor rounds down, which eats into the slack
+        the rooms have to expand into. The largest factor whose rounding costs at most
+        max_waste of the room area is used, so factors that line up with the plan's lengths
+        are preferred; 1 (no downscaling) when none does.
+        """
+        origin_x = min(region['x'] for region in self.floor_regions)
+        origin_y = min(region['y'] for region in self.floor_regions)
+        span = max(self.floor_width - origin_x, self.floor_height - origin_y)
+        smallest_side = min((min(room.original_width, room.original_height) for room in self.rooms), default=span)
+        largest = max(1, int(min(span // target_cells, smallest_side)))
+
+        room_area = sum(room.original_width * room.original_height for room in self.rooms)
+        floor_rects = RegionIndex(self.floor_regions).rects
+        for factor in range(largest, 1, -1):
+            grown = sum(-(-room.original_width // factor) * -(-room.original_height // factor) * factor * factor
+                        - room.original_width * room.original_height for room in self.rooms)
+            lost = 0
+            for rect in floor_rects:
+                width = (rect['x'] + rect['width']) // factor - -(-rect['x'] // factor)
+                height = (rect['y'] + rect['height']) // factor - -(-rect['y'] // factor)
+                lost += rect['width'] * rect['height'] - max(width, 0) * max(height, 0) * factor * factor
+            if grown + lost <= max_waste * room_area:
+                return factor
+        return 1
+
+    def downscale(self, factor):
+        """
+        Build a coarse copy of the floor plan with every length divided by factor.
+
+        Rounding is conservative: the floor shrinks to the coarse cells it fully covers while
+        rooms and obstacles grow to whole coarse cells, so any legal coarse layout scaled back up is legal
+        at full resolution. Returns None when no region survives.
+        """
+        # A coarse cell is floor when the regions cover it completely, also when it spans
+        # several of them, so regions that meet off the coarse grid stay connected
+        floor = RegionIndex(self.floor_regions)
+        left = min(rect['x'] for rect in floor.rects) // factor
+        bottom = min(rect['y'] for rect in floor.rects) // factor
+        right = -(-max(rect['x'] + rect['width'] for rect in floor.rects) // factor)
+        top = -(-max(rect['y'] + rect['height'] for rect in floor.rects) // factor)
+
+        rows = []
+        for row in range(bottom, top):
+            start = None
+            for col in range(left, right + 1):
+                inside = col < right and floor.contains_rect(col * factor, row * factor, factor, factor)
+                if inside and start is None:
+                    start = col
+                elif not inside and start is not None:
+                    rows.append({'x': start, 'y': row, 'width': col - start, 'height': 1})
+                    start = None
+
+        if not rows:
+            return None
+        regions = RegionIndex(rows).rects
+
+        # Obstacles grow to every coarse cell they touch
+        obstacles = [
+            {
+                'name': obstacle['name'],
+                'x': obstacle['x'] // factor,
+                'y': obstacle['y'] // factor,
+                'width': -(-(obstacle['x'] + obstacle['width']) // factor) - obstacle['x'] // factor,
+                'height': -(-(obstacle['y'] + obstacle['height']) // factor) - obstacle['y'] // factor
+            }
+            for obstacle in self.obstacles
+        ]
+
+        coarse = FloorPlan(regions, obstacles)
+        for room in self.rooms:
+            coarse.add_room(room.name, -(-room.original_width // factor), -(-room.original_height // factor),
+                            room.max_expansion // factor)
+        for room1_name, room2_name, data in self.adjacency_graph.edges(data=True):
+            coarse.add_adjacency(room1_name, room2_name, data.get('weight', 1),
+                                 -(-data.get('min_wall_length', 0) // factor))
+        coarse.set_objective(**self.objective_settings)
+        if self.profiler is not None:
+            self.profiler.attach(coarse)
+
+        return coarse
+
+    def _refine_from_coarse(self, coarse, factor, enable_expansion):
+        """
+        Map a coarse layout back to full resolution.
+
+        Each room keeps to its scaled-up coarse footprint, so rooms stay legal. Coarse growth
+        is carried over within the room's max_expansion. The room then slides, within one
+        coarse cell of its footprint, to where it satisfies the most adjacencies, and a final
+        expand_rooms closes the small gaps left by rounding.
+        """
+        coarse_rooms = {room.name: room for room in coarse.rooms}
+        rooms_by_name = {room.name: room for room in self.rooms}
+        footprints = {}
 
-                        if placed:
-                            break
+        for room in self.rooms:
+            coarse_room = coarse_rooms[room.name]
+            room.rotated = False
+            room.reset_to_original_size()
+            if coarse_room.rotated:
+                room.rotate()
+
+            footprint_width = coarse_room.width * factor
+            footprint_height = coarse_room.height * factor
+
+            if enable_expansion:
+                if coarse_room.rotated:
+                    coarse_width, coarse_height = coarse_room.original_height, coarse_room.original_width
+                else:
+                    coarse_width, coarse_height = coarse_room.original_width, coarse_room.original_height
+                grow_width = min(footprint_width - room.width, (coarse_room.width - coarse_width) * factor)
+                grow_height = min(footprint_height - room.height, (coarse_room.height - coarse_height) * factor)
+                if grow_width + grow_height > room.max_expansion:
+                    grow_width = room.max_expansion * grow_width // (grow_width + grow_height)
+                    grow_height = room.max_expansion - grow_width
+                room.width += max(grow_width, 0)
+                room.height += max(grow_height, 0)
+
+            footprints[room.name] = (coarse_room.x * factor, coarse_room.y * factor,
+                                     footprint_width - room.width, footprint_height - room.height)
+            room.x = coarse_room.x * factor
+            room.y = coarse_room.y * factor
+
+        # Slide every room to the position that satisfies the most adjacencies: its footprint
+        # corners, or a position lined up with a neighbour's wall, within one coarse cell of
+        # its footprint. Rooms may leave their footprints, so every move is checked for legality.
+        def satisfied_at(room, neighbours, position):
+            room.x, room.y = position
+            satisfied = 0
+            for other, min_wall_length in neighbours:
+                length = room.shared_wall_length(other)
+                if length > 0 and length >= min_wall_length:
+                    satisfied += 1
+            return satisfied
+
+        for _ in range(3):
+            moved = False
+            for room in self.rooms:
+                x, y, slack_x, slack_y = footprints[room.name]
+                neighbours = [(rooms_by_name[name], data.get('min_wall_length', 0))
+                              for name, data in self.adjacency_graph[room.name].items()]
+                placed_neighbours = [other for other, _ in neighbours if other.x is not None]
+
+                xs = {x, x + slack_x}
+                ys = {y, y + slack_y}
+                for other in placed_neighbours:
+                    xs.update((other.x - room.width, other.x + other.width, other.x,
+                               other.x + other.width - room.width))
+                    ys.update((other.y - room.height, other.y + other.height, other.y,
+                               other.y + other.height - room.height))
+                xs = [px for px in xs if x - factor <= px <= x + slack_x + factor]
+                ys = [py for py in ys if y - factor <= py <= y + slack_y + factor]
+
+                current = (room.x, room.y)
+                best_position, best_satisfied = current, satisfied_at(room, neighbours, current)
+                for position in sorted((px, py) for px in xs for py in ys):
+                    satisfied = satisfied_at(room, neighbours, position)
+                    if satisfied <= best_satisfied:
+                        continue
+                    if self.is_within_floor(position[0], position[1], room.width, room.height) and \
+                            not self.check_overlap(room, position[0], position[1], room.width, room.height):
+                        best_position, best_satisfied = position, satisfied
+
+                room.x, room.y = best_position
+                moved = moved or best_position != current
+
+            if not moved:
+                break
+
+        if enable_expansion:
+            self.expand_rooms()
+
+    def place_rooms_multiresolution(self, factor=None, solve=None, enable_expansion=True):
+        """
+        Solve on a downscaled grid and refine the result at full resolution.
+
+        solve is called with the floor plan to lay out and returns whether it succeeded; it
+        defaults to place_rooms_with_constraints. factor may also be fractional, e.g. 0.05 to
+        solve a plan given in metres with fractional dimensions on a whole-number 5 cm grid.
+        Falls back to solving at full resolution when the coarse problem can't be built or
+        solved. Returns (success, report).
+        """
+        if solve is None:
+            def solve(plan):
+                return plan.place_rooms_with_constraints(enable_expansion=enable_expansion)
+
+        factor = exact_length(factor) if factor else self.suggest_resolution_factor()
+        report = {'factor': factor, 'fell_back': False}
+
+        coarse = self.downscale(factor) if factor != 1 else None
+        if coarse is not None and coarse.analyze_feasibility()['feasible'] and solve(coarse):
+            self._refine_from_coarse(coarse, factor, enable_expansion)
+            report['coarse_floor'] = [coarse.floor_width, coarse.floor_height]
+            return True, report
+
+        report['fell_back'] = True
+        return solve(self), report
+
+    def place_rooms_exact(self, time_limit=10.0, enable_expansion=True):
+        """
+        Place rooms with the branch-and-bound solver and return its report.
+
+        The report's score is the weighted adjacency score before expansion, which is what
+        the solver proves optimal; final_score is the same score measured after expansion.
+        """
+        self._require_grid('exact')
+        report = solve_exact(self, time_limit=time_limit)
+
+        if report['score'] is not None and enable_expansion:
+            self.expand_rooms()
+
+        report['final_score'] = self.weighted_adjacency_score() if report['score'] is not None else None
+        return report
+
+    def improve_with_tabu(self, max_iterations=200, time_limit=2.0, enable_expansion=True):
+        """
+        Run tabu search from the current placement to repair missed adjacencies.
+
+        With expansion enabled, rooms are shrunk back to their original size so they have
+        space to move, then expanded again. The original layout is kept if the repaired
+        one ends up with a lower score. All scores in the report are weighted (see
+        TabuSearch.score). Layouts with unplaced rooms are returned unchanged.
+        """
+        self._require_integral('tabu')
+        search = TabuSearch(self)
+        original_placement = self.snapshot_placement()
+        original_score = search.score()
+
+        if any(room.x is None for room in self.rooms):
+            return {'initial_score': original_score, 'score': original_score, 'max_score': search.max_score,
+                    'iterations': 0, 'elapsed_seconds': 0.0, 'kept_original': True, 'final_score': original_score}
+
+        if enable_expansion:
+            for room in self.rooms:
+                room.reset_to_original_size()
 
-                if not placed:
-                    all_placed = False
-                    break
+        report = search.run(max_iterations=max_iterations, time_limit=time_limit)
 
-            if all_placed:
-                current_placement = [
-                    (room.name, room.x, room.y, room.width, room.height, room.rotated, room.max_expansion)
-                    for room in self.rooms]
+        if enable_expansion:
+            self.expand_rooms()
 
-                if enable_expansion:
-                    self.expand_rooms()
+        # The search itself starts from the shrunk rooms; the layout it improves is the original one
+        report['initial_score'] = original_score
+        final_score = search.score()
+        report['kept_original'] = final_score < original_score
+        if report['kept_original']:
+            self.apply_placement(original_placement)
+            final_score = original_score
+        report['final_score'] = final_score
 
-                score, _ = self.evaluate_adjacency_score()
+        return report
 
-                if score > best_score:
-                    best_score = score
-                    best_placement = [
-                        (room.name, room.x, room.y, room.width, room.height, room.rotated, room.max_expansion)
-                        for room in self.rooms]
+    def place_rooms_genetic(self, population_size=100, generations=200, time_limit=10.0, enable_expansion=True):
+        """Place rooms with the genetic solver and return its report"""
+        self._require_grid('genetic')
+        report = solve_genetic(self, population_size=population_size, generations=generations,
+                               time_limit=time_limit)
 
-                if score == len(self.adjacency_graph.edges):
-                    break
+        if report['status'] == 'placed':
+            if enable_expansion:
+                self.expand_rooms()
+            statistics = self.get_statistics()
+            report['final_score'] = self.weighted_adjacency_score()
+            report['utilization_percentage'] = statistics['utilization_percentage']
 
-        # Restore best placement
-        if best_placement:
-            for room_data in best_placement:
-                name, x, y, width, height, rotated, max_expansion = room_data
-                room = next(r for r in self.rooms if r.name == name)
-                room.x = x
-                room.y = y
-                room.width = width
-                room.height = height
-                room.rotated = rotated
-                room.max_expansion = max_expansion
-            return True
+        return report
 
-        return all_placed
+    def place_rooms_hierarchical(self, max_cluster_rooms=30, max_attempts=200, workers=None,
+                                 repair_time_limit=2.0, enable_expansion=True):
+        """Place rooms cluster by cluster with the hierarchical solver and return its report"""
+        report = solve_hierarchical(self, max_cluster_rooms=max_cluster_rooms, max_attempts=max_attempts,
+                                    workers=workers, repair_time_limit=repair_time_limit)
+
+        if report['status'] == 'placed' and enable_expansion:
+            self.expand_rooms()
+            report['final_score'] = self.weighted_adjacency_score()
+
+        return report
+
+    def place_rooms_sequence_pair(self, iterations=20000, time_limit=10.0, enable_expansion=True):
+        """Place rooms with the sequence-pair annealing solver and return its report"""
+        self._require_grid('sequence_pair')
+        report = solve_sequence_pair(self, iterations=iterations, time_limit=time_limit)
+
+        if report['status'] == 'placed' and enable_expansion:
+            self.expand_rooms()
+            report['final_score'] = self.weighted_adjacency_score()
+
+        return report
 
     def generate_visualization(self):
         """Generate floor plan visualization and return as base64 encoded image"""
@@ -342,9 +1346,9 @@ class FloorPlan:
         # Draw floor shape
         for region in self.floor_regions:
             rect = patches.Rectangle(
-                (region['x'], region['y']),
-                region['width'],
-                region['height'],
+                (float(region['x']), float(region['y'])),
+                float(region['width']),
+                float(region['height']),
                 linewidth=2,
                 edgecolor='black',
                 facecolor='none',
@@ -352,14 +1356,27 @@ class FloorPlan:
             )
             ax.add_patch(rect)
 
+        # Draw obstacles
+        for obstacle in self.obstacles:
+            rect = patches.Rectangle(
+                (float(obstacle['x']), float(obstacle['y'])),
+                float(obstacle['width']),
+                float(obstacle['height']),
+                linewidth=1,
+                edgecolor='black',
+                facecolor='dimgray',
+                hatch='//'
+            )
+            ax.add_patch(rect)
+
         # Draw rooms
         colors = plt.cm.tab20(np.linspace(0, 1, len(self.rooms)))
         for i, room in enumerate(self.rooms):
             if room.x is not None and room.y is not None:
                 rect = patches.Rectangle(
-                    (room.x, room.y),
-                    room.width,
-                    room.height,
+                    (float(room.x), float(room.y)),
+                    float(room.width),
+                    float(room.height),
                     linewidth=1,
                     edgecolor='black',
                     facecolor=colors[i],
@@ -368,16 +1385,18 @@ class FloorPlan:
                 ax.add_patch(rect)
 
                 # Add room labels
-                display_text = f"{room.name}\n{room.width}x{room.height}"
+                display_text = f"{room.name}\n{format_length(room.width)}x{format_length(room.height)}"
                 if room.width != room.original_width or room.height != room.original_height:
                     if room.rotated:
-                        display_text += f"\n(from {room.original_height}x{room.original_width})"
+                        display_text += f"\n(from {format_length(room.original_height)}x" \
+                                        f"{format_length(room.original_width)})"
                     else:
-                        display_text += f"\n(from {room.original_width}x{room.original_height})"
+                        display_text += f"\n(from {format_length(room.original_width)}x" \
+                                        f"{format_length(room.original_height)})"
 
                 ax.text(
-                    room.x + room.width / 2,
-                    room.y + room.height / 2,
+                    float(room.x + room.width / 2),
+                    float(room.y + room.height / 2),
                     display_text,
                     ha='center',
                     va='center',
@@ -391,8 +1410,8 @@ class FloorPlan:
             room2 = next((r for r in self.rooms if r.name == room2_name), None)
 
             if room1 and room2 and room1.x is not None and room2.x is not None:
-                center1 = (room1.x + room1.width / 2, room1.y + room1.height / 2)
-                center2 = (room2.x + room2.width / 2, room2.y + room2.height / 2)
+                center1 = (float(room1.x + room1.width / 2), float(room1.y + room1.height / 2))
+                center2 = (float(room2.x + room2.width / 2), float(room2.y + room2.height / 2))
 
                 if room1.has_shared_wall_with(room2):
                     ax.plot([center1[0], center2[0]], [center1[1], center2[1]], 'g-', linewidth=2)
@@ -400,8 +1419,8 @@ class FloorPlan:
                     ax.plot([center1[0], center2[0]], [center1[1], center2[1]], 'r:', linewidth=1)
 
         # Set plot properties
-        ax.set_xlim(-1, self.floor_width + 1)
-        ax.set_ylim(-1, self.floor_height + 1)
+        ax.set_xlim(-1, float(self.floor_width) + 1)
+        ax.set_ylim(-1, float(self.floor_height) + 1)
         ax.set_aspect('equal')
         ax.set_title('Floor Plan Layout')
         ax.set_xlabel('Width')
@@ -419,37 +1438,36 @@ class FloorPlan:
 
     def get_statistics(self):
         """Get floor plan statistics"""
-        total_area = sum(region['width'] * region['height'] for region in self.floor_regions)
+        total_area = self.region_index.area
         used_area = sum(room.width * room.height for room in self.rooms if room.x is not None)
 
         score, adjacent_pairs = self.evaluate_adjacency_score()
+        objective = self.compile_objective()
 
         room_stats = []
         for room in self.rooms:
             if room.x is not None:
                 original_area = room.original_width * room.original_height
                 current_area = room.width * room.height
-                expansion_pct = (current_area - original_area) / original_area * 100 if original_area > 0 else 0
-
-                if not room.rotated:
-                    total_expansion = (room.width - room.original_width) + (room.height - room.original_height)
-                else:
-                    total_expansion = (room.width - room.original_height) + (room.height - room.original_width)
+                expansion_pct = float((current_area - original_area) / original_area * 100) if original_area > 0 else 0
 
                 room_stats.append({
                     'name': room.name,
-                    'original_size': f"{room.original_width}x{room.original_height}",
-                    'current_size': f"{room.width}x{room.height}",
+                    'original_size': f"{format_length(room.original_width)}x{format_length(room.original_height)}",
+                    'current_size': f"{format_length(room.width)}x{format_length(room.height)}",
                     'expansion_percentage': round(expansion_pct, 1),
-                    'expansion_used': f"{total_expansion}/{room.max_expansion}",
+                    'expansion_used': f"{format_length(room.expansion_used())}/{format_length(room.max_expansion)}",
                     'rotated': room.rotated
                 })
 
         return {
             'total_area': total_area,
+            'obstacle_area': self.region_index.blocked_area,
             'used_area': used_area,
-            'utilization_percentage': round(used_area / total_area * 100, 2) if total_area > 0 else 0,
+            'utilization_percentage': round(float(used_area / total_area * 100), 2) if total_area > 0 else 0,
             'adjacency_score': f"{score}/{len(self.adjacency_graph.edges)}",
+            'objective': round(objective.evaluate_rooms(), 4),
+            'objective_max': round(objective.max_value, 4),
             'adjacent_pairs': adjacent_pairs,
             'room_statistics': room_stats
         }
@@ -458,16 +1476,292 @@ class FloorPlan:
         """Convert floor plan to dictionary for JSON serialization"""
         return {
             'floor_regions': self.floor_regions,
+            'obstacles': self.obstacles,
             'floor_width': self.floor_width,
             'floor_height': self.floor_height,
             'rooms': [room.to_dict() for room in self.rooms],
             'adjacencies': list(self.adjacency_graph.edges),
+            'adjacency_constraints': [
+                {'room1': u, 'room2': v, 'weight': data.get('weight', 1),
+                 'min_wall_length': data.get('min_wall_length', 0)}
+                for u, v, data in self.adjacency_graph.edges(data=True)
+            ],
             'statistics': self.get_statistics()
         }
 
 
 # Global variable to store current floor plan
 current_floor_plan = None
+current_building = None
+
+# Metrics served at /metrics
+metrics = Registry()
+request_latency = metrics.histogram('floorplan_http_request_duration_seconds', 'HTTP request latency by endpoint',
+                                    ('endpoint', 'method'))
+requests_total = metrics.counter('floorplan_http_requests_total', 'HTTP requests by endpoint and status',
+                                 ('endpoint', 'method', 'status'))
+requests_in_progress = metrics.gauge('floorplan_http_requests_in_progress', 'HTTP requests being served',
+                                     ('endpoint',))
+solve_duration = metrics.histogram('floorplan_solve_duration_seconds', 'Layout solve duration',
+                                   ('solver', 'outcome'), SOLVE_BUCKETS)
+solve_attempts = metrics.histogram('floorplan_solve_attempts', 'Attempts made by random solves',
+                                   ('solver',), ATTEMPT_BUCKETS)
+cache_lookups = metrics.counter('floorplan_cache_lookups_total',
+                                'Cache lookups by result; hit rate is hits over all lookups', ('cache', 'result'))
+metrics.gauge('floorplan_active_sessions', 'Floor plans and buildings currently loaded', ('kind',),
+              callback=lambda: {('floor_plan',): int(current_floor_plan is not None),
+                                ('building',): int(current_building is not None)})
+metrics.gauge('floorplan_process_memory_bytes', 'Resident and peak resident memory of the API process', ('kind',),
+              callback=process_memory)
+
+SOLVERS = ('random', 'exact', 'sequence_pair', 'genetic', 'hierarchical')
+
+
+def build_floor_plan(data):
+    """Create a floor plan with its obstacles, rooms and adjacencies from a request payload"""
+    floor_plan = FloorPlan(data['regions'], data.get('obstacles'))
+
+    for room_data in data.get('rooms', []):
+        floor_plan.add_room(
+            room_data['name'],
+            room_data['width'],
+            room_data['height'],
+            room_data.get('max_expansion')
+        )
+
+    for adj in data.get('adjacencies', []):
+        if isinstance(adj, dict):
+            floor_plan.add_adjacency(adj['room1'], adj['room2'], adj.get('weight', 1), adj.get('min_wall_length', 0))
+        else:
+            floor_plan.add_adjacency(*adj[:4])
+
+    return floor_plan
+
+
+def parse_layout_options(data):
+    """Read layout generation options from a request payload, returning (options, error message)"""
+    options = {
+        'max_attempts': data.get('max_attempts'),
+        'enable_expansion': data.get('enable_expansion', True),
+        'placement': data.get('placement', 'random'),
+        'solver': data.get('solver', 'random'),
+        'time_limit': data.get('time_limit', 10.0),
+        'iterations': data.get('iterations', 20000),
+        'population_size': data.get('population_size', 100),
+        'generations': data.get('generations', 200),
+        'tabu': data.get('tabu', False),
+        'tabu_iterations': data.get('tabu_iterations', 200),
+        'tabu_time_limit': data.get('tabu_time_limit', 2.0),
+        'k': data.get('k', 1),
+        'min_diversity': data.get('min_diversity', 0.2),
+        'pareto': data.get('pareto', False),
+        'stagnation_window': data.get('stagnation_window', 0),
+        'perf': data.get('perf', False),
+        'trace': data.get('trace', False),
+        'trace_max_events': data.get('trace_max_events', 100000),
+        'max_cluster_rooms': data.get('max_cluster_rooms', 30),
+        'workers': data.get('workers'),
+        'utilization_weight': data.get('utilization_weight', 0.0),
+        'aspect_weight': data.get('aspect_weight', 0.0),
+        'max_aspect_ratio': data.get('max_aspect_ratio', 2.0),
+        'multiresolution': data.get('multiresolution', False),
+        'resolution_factor': data.get('resolution_factor')
+    }
+
+    if options['placement'] != 'random' and options['placement'] not in FreeSpace.HEURISTICS:
+        return None, f"Invalid placement, expected one of {['random', *FreeSpace.HEURISTICS]}"
+    if options['solver'] not in SOLVERS:
+        return None, f"Invalid solver, expected one of {list(SOLVERS)}"
+
+    return options, None
+
+
+def check_solver_support(floor_plan, options):
+    """Error message when the selected solvers can't handle this floor plan, or None"""
+    room_count = len(floor_plan.rooms)
+    if options['solver'] == 'exact' and room_count > MAX_EXACT_ROOMS:
+        return f'Exact solver supports at most {MAX_EXACT_ROOMS} rooms, got {room_count}'
+    if options['solver'] == 'exact' and not options['multiresolution'] and \
+            floor_plan.grid_cells() > MAX_EXACT_GRID_CELLS:
+        return f'Exact solver supports floors of at most {MAX_EXACT_GRID_CELLS} cells, got {floor_plan.grid_cells()}'
+
+    if not floor_plan.is_integral():
+        # Multiresolution solves on a whole-number grid; tabu still runs at full resolution
+        if options['solver'] in ('exact', 'sequence_pair', 'genetic') and not options['multiresolution']:
+            return INTEGRAL_SOLVER_ERROR.format(options['solver'])
+        if options['tabu']:
+            return INTEGRAL_SOLVER_ERROR.format('tabu')
+    elif floor_plan.grid_cells() > MAX_GRID_CELLS:
+        if options['solver'] in ('exact', 'sequence_pair', 'genetic') and not options['multiresolution']:
+            return GRID_SOLVER_ERROR.format(options['solver'], MAX_GRID_CELLS, floor_plan.grid_cells())
+
+    return None
+
+
+def run_solver(floor_plan, options):
+    """Run the solver selected in options and return (success, solver reports)"""
+    details = {}
+    if options['solver'] == 'exact':
+        report = floor_plan.place_rooms_exact(
+            time_limit=options['time_limit'],
+            enable_expansion=options['enable_expansion']
+        )
+        success = report['status'] != 'infeasible' and report['score'] is not None
+        details['exact'] = report
+    elif options['solver'] == 'sequence_pair':
+        report = floor_plan.place_rooms_sequence_pair(
+            iterations=options['iterations'],
+            time_limit=options['time_limit'],
+            enable_expansion=options['enable_expansion']
+        )
+        success = report['status'] == 'placed'
+        details['sequence_pair'] = report
+    elif options['solver'] == 'genetic':
+        report = floor_plan.place_rooms_genetic(
+            population_size=options['population_size'],
+            generations=options['generations'],
+            time_limit=options['time_limit'],
+            enable_expansion=options['enable_expansion']
+        )
+        success = report['status'] == 'placed'
+        details['genetic'] = report
+    elif options['solver'] == 'hierarchical':
+        report = floor_plan.place_rooms_hierarchical(
+            max_cluster_rooms=options['max_cluster_rooms'],
+            max_attempts=options['max_attempts'],
+            workers=options['workers'],
+            repair_time_limit=options['tabu_time_limit'],
+            enable_expansion=options['enable_expansion']
+        )
+        success = report['status'] == 'placed'
+        details['hierarchical'] = report
+    else:
+        archives = []
+        if options['k'] > 1:
+            top_layouts = TopKLayouts(options['k'], options['min_diversity'])
+            archives.append(top_layouts)
+        if options['pareto']:
+            pareto_front = ParetoArchive()
+            archives.append(pareto_front)
+        trace = TraceRecorder(options['trace_max_events']) if options['trace'] else None
+
+        success = floor_plan.place_rooms_with_constraints(
+            max_attempts=options['max_attempts'],
+            enable_expansion=options['enable_expansion'],
+            placement=options['placement'],
+            archives=archives,
+            stagnation_window=options['stagnation_window'],
+            trace=trace
+        )
+
+        if options['k'] > 1:
+            details['alternatives'] = top_layouts.to_list()
+        if options['pareto']:
+            details['pareto_front'] = pareto_front.to_list()
+        details['random'] = floor_plan.solve_stats
+        if trace is not None:
+            details['trace'] = trace.to_dict()
+
+    return success, details
+
+
+def solve_layout(floor_plan, options):
+    """Run the requested solver on a floor plan and return (success, extra response fields)"""
+    if options['perf']:
+        floor_plan.enable_profiling()
+        try:
+            success, details = solve_layout(floor_plan, {**options, 'perf': False})
+        finally:
+            report = floor_plan.disable_profiling()
+        details['perf'] = report.to_dict()
+        return success, details
+
+    start_time = time.perf_counter()
+    floor_plan.apply_solver_profile()
+    floor_plan.set_objective(
+        utilization_weight=options['utilization_weight'],
+        aspect_weight=options['aspect_weight'],
+        max_aspect_ratio=options['max_aspect_ratio']
+    )
+
+    # Fail fast when the layout can never be generated
+    feasibility = floor_plan.analyze_feasibility()
+    if not feasibility['feasible']:
+        _record_solve(options, 'infeasible', time.perf_counter() - start_time, {})
+        return False, {'infeasibility': feasibility}
+
+    if options['multiresolution']:
+        details = {}
+        # Alternatives of the coarse solve don't carry over to full resolution
+        coarse_options = {**options, 'k': 1, 'pareto': False}
+
+        def solve(plan):
+            plan_success, plan_details = run_solver(plan, coarse_options)
+            details.update(plan_details)
+            return plan_success
+
+        success, details['multiresolution'] = floor_plan.place_rooms_multiresolution(
+            factor=options['resolution_factor'],
+            solve=solve,
+            enable_expansion=options['enable_expansion']
+        )
+    else:
+        success, details = run_solver(floor_plan, options)
+
+    if success and options['tabu']:
+        details['tabu'] = floor_plan.improve_with_tabu(
+            max_iterations=options['tabu_iterations'],
+            time_limit=options['tabu_time_limit'],
+            enable_expansion=options['enable_expansion']
+        )
+
+    _record_solve(options, _solve_outcome(success, details), time.perf_counter() - start_time, details)
+    return success, details
+
+
+def _solve_outcome(success, details):
+    if 'infeasibility' in details:
+        return 'infeasible'
+    return 'placed' if success else 'unplaced'
+
+
+def _record_solve(options, outcome, seconds, details):
+    """Add a finished solve to the metrics"""
+    solve_duration.observe(seconds, solver=options['solver'], outcome=outcome)
+    stats = details.get('random')
+    if stats:
+        solve_attempts.observe(stats['attempts'], solver=options['solver'])
+        duplicates = stats['duplicates_skipped']
+        cache_lookups.inc(duplicates, cache='transposition', result='hit')
+        cache_lookups.inc(stats['complete_layouts'] - duplicates, cache='transposition', result='miss')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    requests_in_progress.inc(endpoint=request.endpoint)
+
+
+@app.after_request
+def record_request(response):
+    if 'request_start' in g:
+        request_latency.observe(time.perf_counter() - g.request_start, endpoint=request.endpoint,
+                                method=request.method)
+        requests_total.inc(endpoint=request.endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def finish_request(exception=None):
+    # Runs even when the request failed, so the in-progress gauge can't drift
+    if 'request_start' in g:
+        requests_in_progress.dec(endpoint=request.endpoint)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(metrics.render(), content_type=Registry.CONTENT_TYPE)
 
 
 @app.route('/', methods=['GET'])
@@ -488,7 +1782,7 @@ def create_floor_plan():
             return jsonify({'error': 'Missing regions data'}), 400
 
         regions = data['regions']
-        current_floor_plan = FloorPlan(regions)
+        current_floor_plan = FloorPlan(regions, data.get('obstacles'))
 
         return jsonify({
             'message': 'Floor plan created successfully',
@@ -514,7 +1808,7 @@ def add_room():
         if not all(field in data for field in required_fields):
             return jsonify({'error': f'Missing required fields: {required_fields}'}), 400
 
-        max_expansion = data.get('max_expansion', 20)
+        max_expansion = data.get('max_expansion')
 
         room = current_floor_plan.add_room(
             data['name'],
@@ -532,6 +1826,38 @@ def add_room():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/add-obstacle', methods=['POST'])
+def add_obstacle():
+    """Add a fixed obstacle (column, shaft, stair core) to the current floor plan"""
+    global current_floor_plan
+
+    if not current_floor_plan:
+        return jsonify({'error': 'No floor plan created. Create a floor plan first.'}), 400
+
+    try:
+        data = request.get_json()
+
+        required_fields = ['x', 'y', 'width', 'height']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': f'Missing required fields: {required_fields}'}), 400
+
+        obstacle = current_floor_plan.add_obstacle(
+            data.get('name', f'Obstacle {len(current_floor_plan.obstacles) + 1}'),
+            data['x'],
+            data['y'],
+            data['width'],
+            data['height']
+        )
+
+        return jsonify({
+            'message': f'Obstacle {obstacle["name"]} added successfully',
+            'obstacle': obstacle
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/add-adjacency', methods=['POST'])
 def add_adjacency():
     """Add adjacency constraint between two rooms"""
@@ -546,7 +1872,12 @@ def add_adjacency():
         if 'room1' not in data or 'room2' not in data:
             return jsonify({'error': 'Missing room1 or room2'}), 400
 
-        current_floor_plan.add_adjacency(data['room1'], data['room2'])
+        current_floor_plan.add_adjacency(
+            data['room1'],
+            data['room2'],
+            data.get('weight', 1),
+            data.get('min_wall_length', 0)
+        )
 
         return jsonify({
             'message': f'Adjacency added between {data["room1"]} and {data["room2"]}',
@@ -568,25 +1899,35 @@ def generate_layout():
     try:
         data = request.get_json() or {}
 
-        max_attempts = data.get('max_attempts', 1000)
-        enable_expansion = data.get('enable_expansion', True)
+        options, error = parse_layout_options(data)
+        if error is None:
+            error = check_solver_support(current_floor_plan, options)
+        if error:
+            return jsonify({'error': error}), 400
 
-        success = current_floor_plan.place_rooms_with_constraints(
-            max_attempts=max_attempts,
-            enable_expansion=enable_expansion
-        )
+        success, details = solve_layout(current_floor_plan, options)
+
+        if 'infeasibility' in details:
+            return jsonify({
+                'message': 'Layout is infeasible',
+                'success': False,
+                'floor_plan': current_floor_plan.to_dict(),
+                **details
+            })
 
         if success:
             return jsonify({
                 'message': 'Layout generated successfully',
                 'success': True,
-                'floor_plan': current_floor_plan.to_dict()
+                'floor_plan': current_floor_plan.to_dict(),
+                **details
             })
         else:
             return jsonify({
                 'message': 'Failed to place all rooms optimally',
                 'success': False,
-                'floor_plan': current_floor_plan.to_dict()
+                'floor_plan': current_floor_plan.to_dict(),
+                **details
             })
 
     except Exception as e:
@@ -642,44 +1983,93 @@ def bulk_setup():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        # Create floor plan
+        # Create floor plan with its rooms and adjacencies
         if 'regions' not in data:
             return jsonify({'error': 'Missing regions data'}), 400
 
-        current_floor_plan = FloorPlan(data['regions'])
-
-        # Add rooms
-        if 'rooms' in data:
-            for room_data in data['rooms']:
-                current_floor_plan.add_room(
-                    room_data['name'],
-                    room_data['width'],
-                    room_data['height'],
-                    room_data.get('max_expansion', 20)
-                )
-
-        # Add adjacencies
-        if 'adjacencies' in data:
-            for adj in data['adjacencies']:
-                current_floor_plan.add_adjacency(adj[0], adj[1])
+        current_floor_plan = build_floor_plan(data)
 
         # Generate layout if requested
         generate_layout_flag = data.get('generate_layout', True)
+        details = {}
         if generate_layout_flag:
-            max_attempts = data.get('max_attempts', 1000)
-            enable_expansion = data.get('enable_expansion', True)
-
-            success = current_floor_plan.place_rooms_with_constraints(
-                max_attempts=max_attempts,
-                enable_expansion=enable_expansion
-            )
+            options, error = parse_layout_options(data)
+            if error is None:
+                error = check_solver_support(current_floor_plan, options)
+            if error:
+                return jsonify({'error': error}), 400
+
+            success, details = solve_layout(current_floor_plan, options)
+
+            if 'infeasibility' in details:
+                return jsonify({
+                    'message': 'Layout is infeasible',
+                    'success': False,
+                    'floor_plan': current_floor_plan.to_dict(),
+                    **details
+                })
         else:
             success = True
 
         return jsonify({
             'message': 'Floor plan setup completed',
             'success': success,
-            'floor_plan': current_floor_plan.to_dict()
+            'floor_plan': current_floor_plan.to_dict(),
+            **details
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/building-setup', methods=['POST'])
+def building_setup():
+    """Set up and solve a multi-floor building with shared cores in one request"""
+    global current_building
+
+    try:
+        data = request.get_json()
+
+        if not data or not data.get('floors'):
+            return jsonify({'error': 'Missing floors data'}), 400
+
+        options, error = parse_layout_options(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        building = Building()
+        for index, floor_data in enumerate(data['floors']):
+            if 'regions' not in floor_data:
+                return jsonify({'error': f'Missing regions data for floor {index}'}), 400
+            floor_name = floor_data.get('name', f'Floor {index + 1}')
+            floor_plan = building.add_floor(floor_name, build_floor_plan(floor_data))
+            error = check_solver_support(floor_plan, options)
+            if error:
+                return jsonify({'error': f'{floor_name}: {error}'}), 400
+
+        for core_data in data.get('cores', []):
+            building.add_core(
+                core_data['name'],
+                exact_length(core_data['width']),
+                exact_length(core_data['height']),
+                exact_length(core_data['x']) if 'x' in core_data else None,
+                exact_length(core_data['y']) if 'y' in core_data else None,
+                core_data.get('floors')
+            )
+
+        success, floor_reports = building.solve(
+            solve_layout, options, workers=data.get('workers'),
+            on_worker_solve=lambda floor_success, details, seconds: _record_solve(
+                options, _solve_outcome(floor_success, details), seconds, details)
+        )
+        current_building = building
+
+        return jsonify({
+            'message': 'Building layout generated successfully' if success else
+                       'Failed to place all rooms optimally on every floor',
+            'success': success,
+            'building': building.to_dict(),
+            'floors': floor_reports
         })
 
     except Exception as e:
@@ -689,8 +2079,9 @@ def bulk_setup():
 @app.route('/api/reset', methods=['POST'])
 def reset_floor_plan():
     """Reset/clear the current floor plan"""
-    global current_floor_plan
+    global current_floor_plan, current_building
     current_floor_plan = None
+    current_building = None
 
     return jsonify({'message': 'Floor plan reset successfully'})
 
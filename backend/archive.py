@@ -0,0 +1,154 @@
+import heapq
+import itertools
+
+
+def layout_key(floor_plan):
+    """Hashable fingerprint of the rooms' current rectangles"""
+    return tuple((room.name, room.x, room.y, room.width, room.height) for room in floor_plan.rooms)
+
+
+def layout_distance(key1, key2):
+    """Fraction of rooms whose rectangle differs between two layout fingerprints"""
+    if not key1:
+        return 0.0
+    return sum(1 for a, b in zip(key1, key2) if a != b) / len(key1)
+
+
+class TopKLayouts:
+    """
+    The k best distinct layouts seen during a solve, kept in a bounded min-heap.
+
+    Identical layouts are only kept once. A layout closer than min_diversity (the
+    fraction of rooms placed differently, see layout_distance) to layouts already kept
+    only gets in when it beats all of them, and then replaces them, so the kept layouts
+    stay apart from each other.
+    """
+
+    def __init__(self, k, min_diversity=0.0):
+        self.k = k
+        self.min_diversity = min_diversity
+        self.heap = []
+        self.counter = itertools.count()
+
+    def threshold(self):
+        """Value a layout must beat to get in"""
+        return self.heap[0][0] if len(self.heap) >= self.k else float('-inf')
+
+    def offer(self, floor_plan, value):
+        """Consider the floor plan's current layout with the given objective value"""
+        if value <= self.threshold():
+            return False
+
+        key = layout_key(floor_plan)
+        similar = [entry for entry in self.heap if layout_distance(entry[2], key) < self.min_diversity or
+                   entry[2] == key]
+        if any(entry[0] >= value for entry in similar):
+            return False
+
+        if similar:
+            self.heap = [entry for entry in self.heap if entry not in similar]
+            heapq.heapify(self.heap)
+
+        layout = {
+            'value': value,
+            'adjacency_score': floor_plan.evaluate_adjacency_score()[0],
+            'placement': floor_plan.snapshot_placement()
+        }
+        heapq.heappush(self.heap, (value, next(self.counter), key, layout))
+        if len(self.heap) > self.k:
+            heapq.heappop(self.heap)
+        return True
+
+    def layouts(self):
+        """Kept layouts, best first"""
+        return [entry[3] for entry in sorted(self.heap, key=lambda entry: (-entry[0], entry[1]))]
+
+    def to_list(self):
+        """Kept layouts in JSON-friendly form, best first"""
+        return [
+            {
+                'objective': round(layout['value'], 4),
+                'adjacency_score': layout['adjacency_score'],
+                'rooms': [
+                    {'name': name, 'x': x, 'y': y, 'width': width, 'height': height, 'rotated': rotated}
+                    for name, x, y, width, height, rotated, _ in layout['placement']
+                ]
+            }
+            for layout in self.layouts()
+        ]
+
+
+class ParetoArchive:
+    """
+    Layouts that are not dominated on (adjacency score, utilization, expansion used).
+
+    Higher adjacency score and utilization are better, less expansion is better. Every
+    layout offered is compared with the archive: it is dropped when some kept layout is
+    at least as good on all three and better on one, otherwise it is added and the
+    layouts it dominates are removed. When the archive grows past max_size, the layout
+    in the most crowded part of the front is dropped.
+    """
+
+    def __init__(self, max_size=50):
+        self.max_size = max_size
+        self.entries = []
+
+    def threshold(self):
+        # Any layout can still land on the front, whatever its objective value
+        return float('-inf')
+
+    @staticmethod
+    def _metrics(floor_plan):
+        placed = [room for room in floor_plan.rooms if room.x is not None]
+        used_area = sum(room.width * room.height for room in placed)
+        floor_area = floor_plan.region_index.area
+        expansion = sum(room.expansion_used() for room in placed)
+        utilization = round(float(used_area / floor_area * 100), 2) if floor_area else 0
+        return floor_plan.evaluate_adjacency_score()[0], utilization, expansion
+
+    @staticmethod
+    def _dominates(a, b):
+        """Check if metrics a dominate metrics b"""
+        at_least = a[0] >= b[0] and a[1] >= b[1] and a[2] <= b[2]
+        return at_least and (a[0] > b[0] or a[1] > b[1] or a[2] < b[2])
+
+    def offer(self, floor_plan, value):
+        """Consider the floor plan's current layout; value is not used by the front"""
+        metrics = self._metrics(floor_plan)
+        if any(entry['metrics'] == metrics or self._dominates(entry['metrics'], metrics) for entry in self.entries):
+            return False
+
+        self.entries = [entry for entry in self.entries if not self._dominates(metrics, entry['metrics'])]
+        self.entries.append({'metrics': metrics, 'placement': floor_plan.snapshot_placement()})
+
+        if len(self.entries) > self.max_size:
+            distances = self._crowding_distances()
+            self.entries.remove(min(self.entries, key=lambda entry: distances[id(entry)]))
+        return True
+
+    def _crowding_distances(self):
+        """Crowding distance of every entry, keyed by id; the ends of the front are never dropped"""
+        distances = {id(entry): 0.0 for entry in self.entries}
+        for axis in range(3):
+            ordered = sorted(self.entries, key=lambda entry: entry['metrics'][axis])
+            span = float(ordered[-1]['metrics'][axis] - ordered[0]['metrics'][axis]) or 1.0
+            distances[id(ordered[0])] = distances[id(ordered[-1])] = float('inf')
+            for previous, entry, following in zip(ordered, ordered[1:], ordered[2:]):
+                distances[id(entry)] += float(following['metrics'][axis] - previous['metrics'][axis]) / span
+        return {id(entry): distances[id(entry)] for entry in self.entries}
+
+    def to_list(self):
+        """Front in JSON-friendly form, best adjacency score first"""
+        return [
+            {
+                'adjacency_score': entry['metrics'][0],
+                'utilization_percentage': entry['metrics'][1],
+                'expansion_used': entry['metrics'][2],
+                'rooms': [
+                    {'name': name, 'x': x, 'y': y, 'width': width, 'height': height, 'rotated': rotated}
+                    for name, x, y, width, height, rotated, _ in entry['placement']
+                ]
+            }
+            for entry in sorted(self.entries, key=lambda entry: (-entry['metrics'][0], -entry['metrics'][1],
+                                                                 entry['metrics'][2]))
+        ]
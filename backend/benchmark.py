@@ -0,0 +1,268 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from app import build_floor_plan, parse_layout_options, solve_layout
+
+
+# Residential scenarios of maxSize.py and negative.py, as bulk-setup payloads
+REFERENCE_PLANS = {
+    'max_size': {
+        'regions': [(12, 4), (18, 6), (22, 6)],
+        'rooms': [
+            {'name': 'Living Room', 'width': 8, 'height': 4, 'max_expansion': 15},
+            {'name': 'Kitchen', 'width': 6, 'height': 4, 'max_expansion': 8},
+            {'name': 'Bedroom 1', 'width': 5, 'height': 4, 'max_expansion': 10},
+            {'name': 'Bedroom 2', 'width': 5, 'height': 4, 'max_expansion': 6},
+            {'name': 'Bathroom', 'width': 3, 'height': 4, 'max_expansion': 2},
+            {'name': 'Hallway', 'width': 2, 'height': 4, 'max_expansion': 5},
+            {'name': 'secretRoom', 'width': 2, 'height': 3, 'max_expansion': 0}
+        ],
+        'adjacencies': [
+            ['Living Room', 'Kitchen'], ['Living Room', 'Bathroom'], ['Kitchen', 'Bedroom 1'],
+            ['Bedroom 1', 'Bedroom 2'], ['Bedroom 2', 'Hallway'], ['Hallway', 'Bathroom'],
+            ['secretRoom', 'Bedroom 2']
+        ]
+    },
+    'negative': {
+        'regions': [
+            {'x': 0, 'y': 0, 'width': 10, 'height': 10},
+            {'x': 10, 'y': 0, 'width': 8, 'height': 5},
+            {'x': 0, 'y': 10, 'width': 5, 'height': 8},
+            {'x': 10, 'y': 5, 'width': 6, 'height': 6}
+        ],
+        'rooms': [
+            {'name': 'Living Room', 'width': 8, 'height': 4, 'max_expansion': 15},
+            {'name': 'Kitchen', 'width': 6, 'height': 4, 'max_expansion': 8},
+            {'name': 'Bedroom 1', 'width': 5, 'height': 4, 'max_expansion': 10},
+            {'name': 'Bedroom 2', 'width': 5, 'height': 4, 'max_expansion': 6},
+            {'name': 'Bathroom', 'width': 3, 'height': 4, 'max_expansion': 2},
+            {'name': 'Hallway', 'width': 2, 'height': 4, 'max_expansion': 5},
+            {'name': 'Office', 'width': 3, 'height': 3, 'max_expansion': 0},
+            {'name': 'secretRoom', 'width': 3, 'height': 3, 'max_expansion': 3}
+        ],
+        'adjacencies': [
+            ['Living Room', 'Kitchen'], ['Living Room', 'Bathroom'], ['Kitchen', 'Bedroom 1'],
+            ['Bedroom 2', 'Hallway'], ['Hallway', 'Bathroom'], ['Office', 'Bedroom 2'],
+            ['secretRoom', 'Kitchen']
+        ]
+    }
+}
+
+# Share of the floor the generated rooms cover before expansion
+GENERATED_DENSITY = 0.7
+
+
+def _floor_regions(shape, area):
+    """Regions of an L, U or stacked floor with about the given area"""
+    if shape == 'L':
+        # Full-width bottom half and a left half on top: 3/4 of a side x side square
+        side = int((area * 4 / 3) ** 0.5) + 1
+        half = side // 2
+        return [{'x': 0, 'y': 0, 'width': side, 'height': half},
+                {'x': 0, 'y': half, 'width': half, 'height': side - half}]
+    if shape == 'U':
+        # Full-width bottom third and two side arms: 7/9 of a side x side square
+        side = int((area * 9 / 7) ** 0.5) + 1
+        third = side // 3
+        return [{'x': 0, 'y': 0, 'width': side, 'height': third},
+                {'x': 0, 'y': third, 'width': third, 'height': side - third},
+                {'x': side - third, 'y': third, 'width': third, 'height': side - third}]
+    if shape == 'stacked':
+        # Three stacked rectangles narrowing upwards, like the maxSize.py floor:
+        # width^2 + 3/8 width^2 + 1/2 width^2 = 15/8 of a width x width square
+        width = int((area * 8 / 15) ** 0.5) + 1
+        return [(width, width), (width * 3 // 4, width // 2), (width // 2, width)]
+    raise ValueError(f"Unknown floor shape '{shape}'")
+
+
+def generated_plan(rooms, shape, seed=0):
+    """Bulk-setup payload of a generated plan: random rooms, a spanning tree of adjacencies plus extras"""
+    rnd = random.Random(seed)
+    sizes = [(rnd.randint(2, 6), rnd.randint(2, 6)) for _ in range(rooms)]
+    area = sum(width * height for width, height in sizes) / GENERATED_DENSITY
+
+    adjacencies = [[f'R{index}', f'R{rnd.randrange(index)}'] for index in range(1, rooms)]
+    for _ in range(rooms // 4):
+        first, second = rnd.sample(range(rooms), 2)
+        adjacencies.append([f'R{first}', f'R{second}'])
+
+    return {
+        'regions': _floor_regions(shape, area),
+        'rooms': [{'name': f'R{index}', 'width': width, 'height': height, 'max_expansion': 3}
+                  for index, (width, height) in enumerate(sizes)],
+        'adjacencies': adjacencies
+    }
+
+
+def benchmark_cases():
+    """
+    Benchmark cases as {name: (payload, layout options)}.
+
+    The reference plans and the 50-room plans run the random solver; the 200 and 500-room
+    plans run the hierarchical solver, which is what plans of that size need.
+    """
+    cases = {name: (payload, {}) for name, payload in REFERENCE_PLANS.items()}
+    for rooms, options in ((50, {'max_attempts': 200}), (200, {'solver': 'hierarchical'}),
+                           (500, {'solver': 'hierarchical'})):
+        for shape in ('L', 'U', 'stacked'):
+            cases[f'{shape}_{rooms}'] = (generated_plan(rooms, shape, seed=rooms), options)
+    return cases
+
+
+def run_case(payload, options, seed, measure_memory=True):
+    """
+    Solve one case with a fixed seed and return its metrics.
+
+    Timings come from a plain run; peak memory from a second run of the same seed under
+    tracemalloc, so tracing doesn't slow down the timed run. Only this process is traced,
+    not the worker processes of the hierarchical solver.
+    """
+    layout_options, error = parse_layout_options(options)
+    if error:
+        raise ValueError(error)
+
+    floor_plan = build_floor_plan(payload)
+    random.seed(seed)
+    start = time.perf_counter()
+    success, details = solve_layout(floor_plan, layout_options)
+    elapsed = time.perf_counter() - start
+
+    statistics = floor_plan.get_statistics()
+    # The random and hierarchical solvers both report attempts and the times of the first and best layout
+    solve_stats = details.get('random') or details.get('hierarchical') or {}
+    result = {
+        'seed': seed,
+        'success': success,
+        'seconds': round(elapsed, 4),
+        'attempts': solve_stats.get('attempts'),
+        'attempts_per_second': round(solve_stats['attempts'] / elapsed, 2) if solve_stats and elapsed else None,
+        'first_complete_seconds': solve_stats.get('first_complete_seconds'),
+        'best_seconds': solve_stats.get('best_seconds'),
+        'adjacency_score': floor_plan.evaluate_adjacency_score()[0] if success else None,
+        'max_adjacency_score': floor_plan.adjacency_graph.number_of_edges(),
+        'utilization_percentage': statistics['utilization_percentage'],
+        'peak_memory_bytes': None
+    }
+
+    if measure_memory:
+        floor_plan = build_floor_plan(payload)
+        random.seed(seed)
+        tracemalloc.start()
+        try:
+            solve_layout(floor_plan, layout_options)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return round(sum(values) / len(values), 4) if values else None
+
+
+def run_benchmarks(names=None, seeds=(0, 1, 2), measure_memory=True, log=None):
+    """Run the named cases (all by default) for every seed; returns a JSON-friendly report"""
+    cases = benchmark_cases()
+    unknown = [name for name in names or () if name not in cases]
+    if unknown:
+        raise ValueError(f'Unknown benchmark cases {unknown}')
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'revision': _revision(),
+        'seeds': list(seeds),
+        'cases': {}
+    }
+    for name in names or cases:
+        payload, options = cases[name]
+        runs = []
+        for seed in seeds:
+            runs.append(run_case(payload, options, seed, measure_memory))
+            if log:
+                log(f'{name} seed={seed} {runs[-1]}')
+
+        summary = {key: _mean(run[key] for run in runs) for key in
+                   ('seconds', 'attempts_per_second', 'first_complete_seconds', 'best_seconds', 'adjacency_score',
+                    'utilization_percentage', 'peak_memory_bytes')}
+        summary['success_rate'] = _mean(1 if run['success'] else 0 for run in runs)
+        report['cases'][name] = {'rooms': len(payload['rooms']), 'options': options, 'summary': summary,
+                                 'runs': runs}
+    return report
+
+
+def _revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, time_tolerance=0.2, score_tolerance=0.0):
+    """
+    Compare a report with a baseline report of the same cases.
+
+    A case regresses when its mean solve time grows by more than time_tolerance (a
+    fraction), or its mean adjacency score or success rate drops by more than
+    score_tolerance. Returns a list of {case, metric, baseline, current} regressions.
+    """
+    regressions = []
+    for name, case in report['cases'].items():
+        if name not in baseline['cases']:
+            continue
+        current = case['summary']
+        previous = baseline['cases'][name]['summary']
+
+        if previous['seconds'] and current['seconds'] > previous['seconds'] * (1 + time_tolerance):
+            regressions.append({'case': name, 'metric': 'seconds', 'baseline': previous['seconds'],
+                                'current': current['seconds']})
+        for metric in ('adjacency_score', 'success_rate'):
+            if previous[metric] is not None and current[metric] is not None and \
+                    current[metric] < previous[metric] - score_tolerance:
+                regressions.append({'case': name, 'metric': metric, 'baseline': previous[metric],
+                                    'current': current[metric]})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the layout solvers on reference and generated plans')
+    parser.add_argument('cases', nargs='*', help='cases to run (all by default)')
+    parser.add_argument('--seeds', type=int, default=3, help='number of fixed seeds per case, starting at 0')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory runs')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against; exits with 1 on regressions')
+    parser.add_argument('--time-tolerance', type=float, default=0.2)
+    parser.add_argument('--list', action='store_true', help='list the benchmark cases and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for case_name, (case_payload, case_options) in benchmark_cases().items():
+            print(f"{case_name}: {len(case_payload['rooms'])} rooms, options {case_options}")
+        sys.exit(0)
+
+    result = run_benchmarks(args.cases, tuple(range(args.seeds)), not args.no_memory,
+                            log=lambda line: print(line, file=sys.stderr))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = compare(result, json.load(f), time_tolerance=args.time_tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression['case']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+        sys.exit(1 if found else 0)
@@ -0,0 +1,155 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _solve_floor(solve, floor_plan, options):
+    """
+    Solve one floor; runs in a worker process.
+
+    Returns (success, details, placement, objective settings, seconds), everything the
+    parent's copy of the floor plan needs to match the solved one.
+    """
+    start_time = time.perf_counter()
+    success, details = solve(floor_plan, options)
+    return (success, details, floor_plan.snapshot_placement(), floor_plan.objective_settings,
+            time.perf_counter() - start_time)
+
+
+class Building:
+    """
+    Several floor plans stacked on top of each other, sharing vertical cores.
+
+    A core (stairs, elevators, risers) occupies the same rectangle on every floor it
+    spans. Cores are pinned before anything else and then added to their floors as
+    obstacles, so the floors no longer depend on each other and can be solved in parallel.
+    """
+
+    def __init__(self):
+        self.floors = []
+        self.cores = []
+        self.cores_placed = False
+
+    def add_floor(self, name, floor_plan):
+        self.floors.append((name, floor_plan))
+        return floor_plan
+
+    def get_floor(self, name):
+        return next((floor_plan for floor_name, floor_plan in self.floors if floor_name == name), None)
+
+    def add_core(self, name, width, height, x=None, y=None, floors=None):
+        """
+        Add a core spanning the named floors (all floors by default).
+
+        Leave x and y out to let place_cores pick a position that is free on every floor.
+        """
+        core = {'name': name, 'width': width, 'height': height, 'x': x, 'y': y, 'floors': floors}
+        self.cores.append(core)
+        return core
+
+    def _core_floors(self, core):
+        names = core['floors'] if core['floors'] is not None else [name for name, _ in self.floors]
+        missing = [name for name in names if self.get_floor(name) is None]
+        if missing:
+            raise ValueError(f"Core {core['name']} spans unknown floors {missing}")
+        return [self.get_floor(name) for name in names]
+
+    @staticmethod
+    def _core_candidates(core, floor_plans):
+        """Core positions worth trying, closest to the middle of the spanned floors first"""
+        width, height = core['width'], core['height']
+        rects = [rect for floor_plan in floor_plans for rect in floor_plan.region_index.rects]
+        if not rects:
+            return []
+
+        center_x = (min(r['x'] for r in rects) + max(r['x'] + r['width'] for r in rects)) / 2
+        center_y = (min(r['y'] for r in rects) + max(r['y'] + r['height'] for r in rects)) / 2
+        integral = all(floor_plan.is_integral() for floor_plan in floor_plans)
+
+        xs = set()
+        ys = set()
+        for rect in rects:
+            xs.update((rect['x'], rect['x'] + rect['width'] - width))
+            ys.update((rect['y'], rect['y'] + rect['height'] - height))
+        middle_x = center_x - width / 2
+        middle_y = center_y - height / 2
+        xs.add(int(middle_x) if integral else middle_x)
+        ys.add(int(middle_y) if integral else middle_y)
+
+        return sorted(((x, y) for x in xs for y in ys),
+                      key=lambda p: (abs(p[0] + width / 2 - center_x) + abs(p[1] + height / 2 - center_y), p))
+
+    def place_cores(self):
+        """
+        Fix the position of every core and cut it out of the floors it spans.
+
+        Pinned cores are checked first, then the rest are placed largest first at the most
+        central position that lies on the floor of every spanned level. Raises ValueError
+        when a core can't be placed. Does nothing once the cores are placed.
+        """
+        if self.cores_placed:
+            return
+
+        pinned = [core for core in self.cores if core['x'] is not None and core['y'] is not None]
+        free = sorted((core for core in self.cores if core not in pinned),
+                      key=lambda c: c['width'] * c['height'], reverse=True)
+
+        for core in pinned + free:
+            floor_plans = self._core_floors(core)
+
+            if core in pinned:
+                candidates = [(core['x'], core['y'])]
+            else:
+                candidates = self._core_candidates(core, floor_plans)
+
+            position = next((
+                (x, y) for x, y in candidates
+                if all(floor_plan.is_within_floor(x, y, core['width'], core['height']) for floor_plan in floor_plans)
+            ), None)
+            if position is None:
+                raise ValueError(f"Core {core['name']} does not fit at the same position on every floor it spans")
+
+            core['x'], core['y'] = position
+            for floor_plan in floor_plans:
+                obstacle = floor_plan.add_obstacle(core['name'], core['x'], core['y'], core['width'], core['height'])
+                core['x'], core['y'] = obstacle['x'], obstacle['y']
+
+        self.cores_placed = True
+
+    def solve(self, solve, options, workers=None, on_worker_solve=None):
+        """
+        Place the cores, then solve every floor with solve(floor_plan, options) in a
+        process pool. solve must be a module-level function returning (success, details).
+
+        Whatever solve records in a worker process (e.g. metrics) is lost with the worker,
+        so on_worker_solve(success, details, seconds) is called in this process for every
+        floor that was solved in a worker. Returns (success, per-floor reports).
+        """
+        self.place_cores()
+
+        floor_plans = [floor_plan for _, floor_plan in self.floors]
+        workers = min(workers or os.cpu_count() or 1, len(floor_plans))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_solve_floor, [solve] * len(floor_plans), floor_plans,
+                                        [options] * len(floor_plans)))
+            if on_worker_solve is not None:
+                for success, details, _, _, seconds in results:
+                    on_worker_solve(success, details, seconds)
+        else:
+            results = [_solve_floor(solve, floor_plan, options) for floor_plan in floor_plans]
+
+        reports = []
+        for (name, floor_plan), (success, details, placement, objective_settings, _) in zip(self.floors, results):
+            floor_plan.apply_placement(placement)
+            floor_plan.objective_settings = objective_settings
+            reports.append({'name': name, 'success': success, **details})
+
+        return all(report['success'] for report in reports), reports
+
+    def to_dict(self):
+        """Convert the building to a dictionary for JSON serialization"""
+        return {
+            'floors': [{'name': name, 'floor_plan': floor_plan.to_dict()} for name, floor_plan in self.floors],
+            'cores': self.cores
+        }
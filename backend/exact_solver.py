@@ -0,0 +1,382 @@
+import time
+
+import numpy as np
+
+
+MAX_EXACT_ROOMS = 15
+# Largest floor (in unit cells) the exact solver scans anchor by anchor
+MAX_EXACT_GRID_CELLS = 100_000
+
+
+def adjacency_order(floor_plan):
+    """
+    Order rooms so that each room is placed right after as many of its neighbours as possible.
+
+    Starts from the room with the highest degree and then repeatedly takes the room with
+    the most links to already ordered rooms (ties broken by degree, then area).
+    """
+    graph = floor_plan.adjacency_graph
+    remaining = list(floor_plan.rooms)
+    ordered_names = set()
+    order = []
+
+    while remaining:
+        room = max(remaining, key=lambda r: (
+            sum(1 for n in graph.neighbors(r.name) if n in ordered_names),
+            graph.degree(r.name),
+            r.original_width * r.original_height
+        ))
+        remaining.remove(room)
+        ordered_names.add(room.name)
+        order.append(room)
+
+    return order
+
+
+def shared_wall_length(a, b):
+    """Same as Room.shared_wall_length, on (x, y, width, height) tuples"""
+    left1, right1, bottom1, top1 = a[0], a[0] + a[2], a[1], a[1] + a[3]
+    left2, right2, bottom2, top2 = b[0], b[0] + b[2], b[1], b[1] + b[3]
+
+    if right1 == left2 or right2 == left1:
+        return max(min(top1, top2) - max(bottom1, bottom2), 0)
+    if top1 == bottom2 or top2 == bottom1:
+        return max(min(right1, right2) - max(left1, left2), 0)
+    return 0
+
+
+def satisfies(a, b, min_wall_length=0):
+    """Check if rectangles a and b share a wall long enough for an adjacency"""
+    length = shared_wall_length(a, b)
+    return length > 0 and length >= min_wall_length
+
+
+def wall_positions(width, height, rect):
+    """All positions where a width x height room shares a wall with rect, an (x, y, width, height) tuple"""
+    x, y, w, h = rect
+    for py in range(y - height + 1, y + h):
+        yield x - width, py
+        yield x + w, py
+    for px in range(x - width + 1, x + w):
+        yield px, y - height
+        yield px, y + h
+
+
+def edge_requirements(graph, index_of):
+    """{(i, j): (weight, min_wall_length)} in both directions for the edges of an adjacency graph"""
+    requirements = {}
+    for u, v, data in graph.edges(data=True):
+        requirement = (data.get('weight', 1), data.get('min_wall_length', 0))
+        requirements[(index_of[u], index_of[v])] = requirement
+        requirements[(index_of[v], index_of[u])] = requirement
+    return requirements
+
+
+def solve_exact(floor_plan, time_limit=10.0, max_rooms=MAX_EXACT_ROOMS, max_cells=MAX_EXACT_GRID_CELLS):
+    """
+    Branch-and-bound search for the placement with the best adjacency score: the summed
+    weights of the adjacencies whose rooms share a wall of at least min_wall_length.
+
+    Rooms are placed in adjacency order over every valid integer anchor in both
+    orientations, trying positions along the walls of already placed neighbours first.
+    A branch is pruned as soon as the weight already satisfied plus an optimistic weight of
+    the edges still undecided (limited by the free wall length of placed rooms) cannot
+    beat the incumbent, and interchangeable rooms (see FloorPlan.analyze_symmetries) are
+    only placed in increasing position order.
+
+    The search runs before expansion. Returns a report whose status is 'optimal' when the
+    search space was exhausted, 'infeasible' when no complete placement exists, or
+    'time_limit' when the search was cut short. The best placement found is applied to
+    the rooms.
+    """
+    rooms = floor_plan.rooms
+    if len(rooms) > max_rooms:
+        raise ValueError(f'Exact solver supports at most {max_rooms} rooms, got {len(rooms)}')
+    if floor_plan.grid_cells() > max_cells:
+        raise ValueError(f'Exact solver supports floors of at most {max_cells} cells, got {floor_plan.grid_cells()}')
+
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit
+    graph = floor_plan.adjacency_graph
+
+    state = {'best': float('-inf'), 'best_placement': None, 'nodes': 0, 'timed_out': False}
+
+    def out_of_time():
+        if time.perf_counter() > deadline:
+            state['timed_out'] = True
+        return state['timed_out']
+
+    order = adjacency_order(floor_plan)
+    position = {room.name: i for i, room in enumerate(order)}
+    count = len(order)
+    requirements = edge_requirements(graph, position)
+    # Bounds are optimistic: an edge with a negative weight is assumed to stay unsatisfied
+    optimistic = {edge: max(weight, 0) for edge, (weight, _) in requirements.items()}
+    edge_positions = [(position[u], position[v]) for u, v in graph.edges]
+    max_score = sum(optimistic[edge] for edge in edge_positions)
+
+    # Neighbours placed before each room, and edge weight still undecided after each depth
+    earlier_neighbours = [
+        [position[n] for n in graph.neighbors(room.name) if position[n] < i]
+        for i, room in enumerate(order)
+    ]
+    undecided_after = [
+        sum(optimistic[(u, v)] for u, v in edge_positions if max(u, v) > i)
+        for i in range(count)
+    ]
+
+    orientations = []
+    for room in order:
+        options = [(room.original_width, room.original_height, False)]
+        if room.original_width != room.original_height:
+            options.append((room.original_height, room.original_width, True))
+        orientations.append(options)
+
+    # Symmetry breaking: a room interchangeable with an earlier one must be placed after it
+    symmetries = floor_plan.analyze_symmetries()
+    twin_of = [None] * count
+    for i, room in enumerate(order):
+        for j in range(i):
+            if symmetries.interchangeable(room.name, order[j].name):
+                twin_of[i] = j
+
+    # Valid anchors per size as (flat indices, row stride, byte lookup by flat index)
+    valid_anchors = {}
+    for options in orientations:
+        for width, height, _ in options:
+            if (width, height) not in valid_anchors and not out_of_time():
+                indices, stride = floor_plan.compute_anchors(width, height)
+                lookup = np.zeros(int(indices[-1]) + 1 if len(indices) else 0, dtype=np.uint8)
+                lookup[indices] = 1
+                valid_anchors[(width, height)] = (indices, stride, lookup.tobytes())
+
+    # Weight of the edges between two rooms that are both still unplaced at each depth
+    unplaced_edges_from = [
+        sum(optimistic[(u, v)] for u, v in edge_positions if min(u, v) >= i)
+        for i in range(count + 1)
+    ]
+    neighbour_positions = [[position[n] for n in graph.neighbors(room.name)] for room in order]
+
+    # Free floor cells, used to count how much wall a placed room has left for new neighbours
+    mask, _, (origin_x, origin_y) = floor_plan._get_floor_mask()
+    grid_height, grid_width = mask.shape
+    free_cells = bytearray(mask.astype('uint8').tobytes())
+
+    def set_cells(rect, value):
+        x, y, w, h = rect
+        for row in range(y - origin_y, y - origin_y + h):
+            start = row * grid_width + x - origin_x
+            free_cells[start:start + w] = bytes([value]) * w
+
+    def is_free(x, y):
+        col, row = x - origin_x, y - origin_y
+        return 0 <= col < grid_width and 0 <= row < grid_height and free_cells[row * grid_width + col]
+
+    def anchors(width, height):
+        """Valid anchor positions of a width x height room in row order, stopping at the deadline"""
+        indices, stride, _ = valid_anchors[(width, height)]
+        for k, index in enumerate(indices.tolist()):
+            if k % 1024 == 1023 and out_of_time():
+                return
+            row, col = divmod(index, stride)
+            yield origin_x + col, origin_y + row
+
+    def rect_is_free(x, y, width, height):
+        _, stride, lookup = valid_anchors[(width, height)]
+        col, row = x - origin_x, y - origin_y
+        if col < 0 or row < 0 or col >= stride or row * stride + col >= len(lookup) or \
+                not lookup[row * stride + col]:
+            return False
+        for row in range(y - origin_y, y - origin_y + height):
+            start = row * grid_width + x - origin_x
+            if free_cells.find(0, start, start + width) != -1:
+                return False
+        return True
+
+    def can_still_touch(u, rect):
+        """Check if unplaced room u has any legal position sharing a wall with rect"""
+        for width, height, _ in orientations[u]:
+            for x, y in wall_positions(width, height, rect):
+                if rect_is_free(x, y, width, height):
+                    return True
+        return False
+
+    def free_wall_units(rect):
+        x, y, w, h = rect
+        units = sum(1 for py in range(y, y + h) if is_free(x - 1, py)) + \
+            sum(1 for py in range(y, y + h) if is_free(x + w, py))
+        units += sum(1 for px in range(x, x + w) if is_free(px, y - 1)) + \
+            sum(1 for px in range(x, x + w) if is_free(px, y + h))
+        return units
+
+    def upper_bound(i, score):
+        """
+        Optimistic score once rooms 0..i-1 are placed: every edge between unplaced rooms,
+        plus for each placed room its unplaced neighbours that can still reach one of its
+        walls, at most one (the heaviest first) per free unit of wall.
+        """
+        bound = score + unplaced_edges_from[i]
+        for j in range(i):
+            if placed[j] is None:
+                continue
+            pending = [optimistic[(j, n)] for n in neighbour_positions[j]
+                       if n >= i and optimistic[(j, n)] > 0 and can_still_touch(n, placed[j])]
+            if pending:
+                pending.sort(reverse=True)
+                bound += sum(pending[:free_wall_units(placed[j])])
+        return bound
+
+    # Rooms whose neighbours all come earlier in the order, with no negative-weight edge to
+    # avoid, lose nothing at a position that doesn't touch one, so instead of enumerating
+    # such positions they are deferred and simply fitted into the remaining space once
+    # everything else is placed (any wall they end up sharing is scored then)
+    deferrable = [
+        not any(n > i for n in neighbour_positions[i]) and
+        all(requirements[(i, n)][0] >= 0 for n in neighbour_positions[i])
+        for i in range(count)
+    ]
+    deferred = []
+
+    placed = [None] * count
+    keys = [None] * count
+
+    def gain_of(i, rect):
+        """Summed weight of the edges room i satisfies at rect with its placed earlier neighbours"""
+        gain = 0
+        for j in earlier_neighbours[i]:
+            weight, min_wall_length = requirements[(i, j)]
+            if placed[j] is not None and satisfies(rect, placed[j], min_wall_length):
+                gain += weight
+        return gain
+
+    def candidates(i, need):
+        """
+        Legal positions for room i whose gain is above need, best first.
+
+        Positions touching a placed neighbour come first; every other valid anchor
+        has no gain and is only generated when need is negative.
+        """
+        found = {}
+        twin = twin_of[i]
+
+        for width, height, rotated in orientations[i]:
+            touching = set()
+            for j in earlier_neighbours[i]:
+                if placed[j] is not None:
+                    touching.update(wall_positions(width, height, placed[j]))
+
+            pools = [touching]
+            if need < 0:
+                pools.append(anchors(width, height))
+
+            for pool in pools:
+                for x, y in pool:
+                    key = (x, y, rotated)
+                    if key in found or not rect_is_free(x, y, width, height):
+                        continue
+                    rect = (x, y, width, height)
+                    if twin is not None and placed[twin] is not None and rect <= placed[twin]:
+                        continue
+                    gain = gain_of(i, rect)
+                    if gain > need:
+                        found[key] = (gain, rect)
+
+        return sorted(found.items(), key=lambda item: (-item[1][0], item[1][1]))
+
+    def search(i, score):
+        state['nodes'] += 1
+        if state['nodes'] % 512 == 0 and time.perf_counter() > deadline:
+            state['timed_out'] = True
+        if state['timed_out']:
+            return
+
+        if i == count:
+            if not place_deferred(0):
+                return
+            score += sum(gain_of(j, placed[j]) for j in deferred)
+            if score > state['best']:
+                state['best'] = score
+                state['best_placement'] = list(zip(keys, placed))
+            for j in deferred:
+                set_cells(placed[j], 1)
+                placed[j] = None
+                keys[j] = None
+            return
+
+        if upper_bound(i, score) <= state['best']:
+            return
+
+        # Only positions whose gain can still beat the incumbent are worth generating
+        need = state['best'] - score - undecided_after[i]
+        if deferrable[i]:
+            # Without a wall shared with a placed neighbour this room only has to fit somewhere
+            need = max(need, 0)
+
+        for key, (gain, rect) in candidates(i, need):
+            if score + gain + undecided_after[i] <= state['best']:
+                break
+
+            placed[i] = rect
+            keys[i] = key
+            set_cells(rect, 0)
+            search(i + 1, score + gain)
+            set_cells(rect, 1)
+            placed[i] = None
+            keys[i] = None
+
+            if state['best'] >= max_score or state['timed_out']:
+                return
+
+        if deferrable[i] and score + undecided_after[i] > state['best']:
+            deferred.append(i)
+            search(i + 1, score)
+            deferred.pop()
+
+    def place_deferred(k):
+        """Fit the deferred rooms into the space left over, largest first"""
+        if k == len(deferred):
+            return True
+
+        i = deferred[k]
+        for width, height, rotated in orientations[i]:
+            for x, y in anchors(width, height):
+                if rect_is_free(x, y, width, height):
+                    placed[i] = (x, y, width, height)
+                    keys[i] = (x, y, rotated)
+                    set_cells(placed[i], 0)
+                    if place_deferred(k + 1):
+                        return True
+                    set_cells(placed[i], 1)
+                    placed[i] = None
+                    keys[i] = None
+
+        return False
+
+    search(0, 0)
+
+    for room in rooms:
+        room.x = None
+        room.y = None
+        room.rotated = False
+        room.reset_to_original_size()
+
+    if state['best_placement'] is not None:
+        for room, (key, rect) in zip(order, state['best_placement']):
+            if key[2]:
+                room.rotate()
+            room.x, room.y = rect[0], rect[1]
+
+    if state['timed_out']:
+        status = 'time_limit'
+    elif state['best_placement'] is None:
+        status = 'infeasible'
+    else:
+        status = 'optimal'
+
+    return {
+        'status': status,
+        'score': state['best'] if state['best_placement'] is not None else None,
+        'max_score': max_score,
+        'nodes': state['nodes'],
+        'elapsed_seconds': round(time.perf_counter() - start_time, 4)
+    }
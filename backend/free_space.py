@@ -0,0 +1,134 @@
+import random
+
+
+class FreeSpace:
+    """
+    Track the empty space of a floor as a list of maximal free rectangles.
+
+    Every free rectangle is stored as a tuple (x, y, width, height). When a room is
+    placed, every free rectangle it intersects is split into the (up to four) maximal
+    rectangles left around it, and rectangles contained in others are dropped. Any
+    free rectangle that is large enough for a room is therefore a legal position.
+    """
+
+    HEURISTICS = ('best_short_side_fit', 'best_area_fit', 'bottom_left')
+
+    def __init__(self, floor_regions=None):
+        self.free_rects = []
+        if floor_regions:
+            self._init_from_regions(floor_regions)
+
+    def _init_from_regions(self, floor_regions):
+        min_x = min(region['x'] for region in floor_regions)
+        min_y = min(region['y'] for region in floor_regions)
+        max_x = max(region['x'] + region['width'] for region in floor_regions)
+        max_y = max(region['y'] + region['height'] for region in floor_regions)
+        self.free_rects = [(min_x, min_y, max_x - min_x, max_y - min_y)]
+
+        # Carve every part of the bounding box that is not covered by a region
+        xs = sorted(set([r['x'] for r in floor_regions] + [r['x'] + r['width'] for r in floor_regions]))
+        ys = sorted(set([r['y'] for r in floor_regions] + [r['y'] + r['height'] for r in floor_regions]))
+
+        for j in range(len(ys) - 1):
+            run_start = None
+            for i in range(len(xs)):
+                covered = i < len(xs) - 1 and any(
+                    r['x'] <= xs[i] < r['x'] + r['width'] and r['y'] <= ys[j] < r['y'] + r['height']
+                    for r in floor_regions
+                )
+                if not covered and i < len(xs) - 1 and run_start is None:
+                    run_start = xs[i]
+                elif (covered or i == len(xs) - 1) and run_start is not None:
+                    self.occupy(run_start, ys[j], xs[i] - run_start, ys[j + 1] - ys[j])
+                    run_start = None
+
+    def copy(self):
+        clone = FreeSpace()
+        clone.free_rects = list(self.free_rects)
+        return clone
+
+    def occupy(self, x, y, width, height):
+        """Mark a rectangle as used and split the free rectangles around it"""
+        right = x + width
+        top = y + height
+        remaining = []
+        changed = False
+
+        for fx, fy, fw, fh in self.free_rects:
+            f_right = fx + fw
+            f_top = fy + fh
+
+            if x >= f_right or right <= fx or y >= f_top or top <= fy:
+                remaining.append((fx, fy, fw, fh))
+                continue
+
+            changed = True
+            if x > fx:
+                remaining.append((fx, fy, x - fx, fh))
+            if right < f_right:
+                remaining.append((right, fy, f_right - right, fh))
+            if y > fy:
+                remaining.append((fx, fy, fw, y - fy))
+            if top < f_top:
+                remaining.append((fx, top, fw, f_top - top))
+
+        if changed:
+            remaining = self._prune(remaining)
+        self.free_rects = remaining
+
+    @staticmethod
+    def _prune(rects):
+        """Remove duplicate rectangles and rectangles contained in another one"""
+        rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for rect in rects:
+            x, y, w, h = rect
+            if not any(kx <= x and ky <= y and x + w <= kx + kw and y + h <= ky + kh
+                       for kx, ky, kw, kh in kept):
+                kept.append(rect)
+        return kept
+
+    def find_position(self, width, height, heuristic='best_short_side_fit'):
+        """
+        Pick a legal bottom-left position for a width x height room.
+
+        Returns (x, y) or None when no free rectangle is large enough.
+        """
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown placement heuristic '{heuristic}', expected one of {self.HEURISTICS}")
+
+        best = None
+        best_key = None
+
+        for fx, fy, fw, fh in self.free_rects:
+            if fw < width or fh < height:
+                continue
+
+            leftover_x = fw - width
+            leftover_y = fh - height
+            if heuristic == 'best_short_side_fit':
+                key = (min(leftover_x, leftover_y), max(leftover_x, leftover_y), fy, fx)
+            elif heuristic == 'best_area_fit':
+                key = (fw * fh - width * height, min(leftover_x, leftover_y), fy, fx)
+            else:
+                key = (fy, fx)
+
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (fx, fy)
+
+        return best
+
+    def sample_position(self, width, height):
+        """
+        Pick a random legal bottom-left position for a width x height room: a random corner
+        of a random free rectangle that is large enough.
+
+        Returns (x, y) or None when no free rectangle is large enough.
+        """
+        fitting = [rect for rect in self.free_rects if rect[2] >= width and rect[3] >= height]
+        if not fitting:
+            return None
+
+        fx, fy, fw, fh = random.choice(fitting)
+        return random.choice((fx, fx + fw - width)), random.choice((fy, fy + fh - height))
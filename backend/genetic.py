@@ -0,0 +1,225 @@
+import random
+import time
+
+import numpy as np
+
+
+# Fitness lost for every room whose anchor overlaps a room earlier in the genome's order
+DROPPED_ROOM_PENALTY = 2.0
+
+
+class PopulationScorer:
+    """
+    Score a whole population of placement genomes at once.
+
+    A genome is an order (a permutation of room indices), a rotation flag per room and an
+    anchor choice per room in [0, 1) that selects one of the room's precomputed valid
+    anchors for its orientation. Overlaps are computed with NumPy over (population, rooms)
+    arrays instead of a Python loop per layout, and the floor plan's compiled objective
+    scores the whole batch at once.
+    """
+
+    def __init__(self, floor_plan, utilization_weight=1.0, deadline=None):
+        self.rooms = floor_plan.rooms
+        self.count = len(self.rooms)
+        self.utilization_weight = utilization_weight
+        self.objective = floor_plan.compile_objective()
+        self.max_score = sum(max(weight, 0) for _, _, weight in floor_plan.adjacency_graph.edges.data('weight', 1))
+
+        self.widths = np.array([room.original_width for room in self.rooms], dtype=np.int32)
+        self.heights = np.array([room.original_height for room in self.rooms], dtype=np.int32)
+        self.areas = self.widths * self.heights
+
+        # Valid anchors as (k, 2) arrays of absolute positions, per room and rotation flag;
+        # timed_out is set when the deadline passed before all of them were computed
+        origin_x, origin_y = floor_plan._get_floor_mask()[2]
+        by_size = {}
+        self.anchors = []
+        self.timed_out = False
+        for room in self.rooms:
+            if deadline is not None and time.perf_counter() > deadline:
+                self.timed_out = True
+                break
+            per_orientation = {}
+            for rotated, size in ((False, (room.original_width, room.original_height)),
+                                  (True, (room.original_height, room.original_width))):
+                if size not in by_size:
+                    indices, stride = floor_plan.compute_anchors(*size)
+                    rows, cols = np.divmod(indices, stride)
+                    by_size[size] = np.stack([origin_x + cols, origin_y + rows], axis=1).astype(np.int32)
+                per_orientation[rotated] = by_size[size]
+            self.anchors.append(per_orientation)
+
+    def decode(self, rotations, choices):
+        """Turn rotation flags and anchor choices into coordinate arrays"""
+        size = rotations.shape[0]
+        xs = np.zeros((size, self.count), dtype=np.int32)
+        ys = np.zeros((size, self.count), dtype=np.int32)
+        missing = np.zeros((size, self.count), dtype=bool)
+
+        for i in range(self.count):
+            for rotated in (False, True):
+                rows = rotations[:, i] == rotated
+                if not rows.any():
+                    continue
+                anchors = self.anchors[i][rotated]
+                if len(anchors) == 0:
+                    missing[rows, i] = True
+                    continue
+                picks = np.minimum((choices[rows, i] * len(anchors)).astype(np.int64), len(anchors) - 1)
+                xs[rows, i] = anchors[picks, 0]
+                ys[rows, i] = anchors[picks, 1]
+
+        widths = np.where(rotations, self.heights, self.widths)
+        heights = np.where(rotations, self.widths, self.heights)
+        return xs, ys, widths, heights, missing
+
+    def score(self, orders, rotations, choices):
+        """Return (fitness, weighted adjacency scores, utilization, dropped room counts) for every genome"""
+        xs, ys, widths, heights, missing = self.decode(rotations, choices)
+        rights = xs + widths
+        tops = ys + heights
+
+        x_overlap = np.minimum(rights[:, :, None], rights[:, None, :]) - np.maximum(xs[:, :, None], xs[:, None, :])
+        y_overlap = np.minimum(tops[:, :, None], tops[:, None, :]) - np.maximum(ys[:, :, None], ys[:, None, :])
+        overlapping = (x_overlap > 0) & (y_overlap > 0)
+        overlapping[:, np.arange(self.count), np.arange(self.count)] = False
+
+        # A room is dropped when it overlaps a room that comes earlier in the genome's order
+        rank = np.argsort(orders, axis=1)
+        earlier = rank[:, None, :] < rank[:, :, None]
+        dropped = (overlapping & earlier).any(axis=2) | missing
+        kept = ~dropped
+
+        values, satisfied, utilization = self.objective.evaluate(xs, rights, ys, tops, kept)
+        scores = (satisfied * self.objective.weights).sum(axis=1)
+        dropped_counts = dropped.sum(axis=1)
+
+        fitness = values + self.utilization_weight * utilization - DROPPED_ROOM_PENALTY * dropped_counts
+        return fitness, scores, utilization, dropped_counts
+
+    def rects(self, rotation, choice):
+        """Rectangles of a single genome as a list of (x, y, width, height)"""
+        xs, ys, widths, heights, _ = self.decode(rotation[None, :], choice[None, :])
+        return [(int(xs[0, i]), int(ys[0, i]), int(widths[0, i]), int(heights[0, i])) for i in range(self.count)]
+
+
+def _order_crossover(parent1, parent2, rng):
+    """Classic OX: keep a slice of parent1 and fill the rest in parent2's order"""
+    count = len(parent1)
+    start, end = sorted(rng.integers(0, count + 1, size=2))
+    child = np.empty(count, dtype=parent1.dtype)
+    child[start:end] = parent1[start:end]
+    kept = set(parent1[start:end].tolist())
+    child[np.r_[0:start, end:count]] = [room for room in parent2.tolist() if room not in kept]
+    return child
+
+
+def solve_genetic(floor_plan, population_size=100, generations=200, time_limit=10.0,
+                  utilization_weight=1.0, mutation_rate=0.05):
+    """
+    Evolve placement genomes and apply the fittest one to the floor plan.
+
+    Each generation is scored in one batch by PopulationScorer. Parents are picked by
+    tournament; children get an order crossover of the orders, uniform crossover of the
+    rotations and anchor choices, and random mutations. The best genomes survive unchanged.
+    The best genome found is decoded in its order, and rooms whose anchor overlaps an
+    earlier room are moved into free space. Returns a report, with status 'time_limit' when
+    the time ran out before the anchors of every room were known.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit
+    count = len(floor_plan.rooms)
+    rng = np.random.default_rng(random.getrandbits(32))
+    scorer = PopulationScorer(floor_plan, utilization_weight, deadline)
+    if scorer.timed_out:
+        return {
+            'status': 'time_limit',
+            'relocated_rooms': None,
+            'score': None,
+            'max_score': scorer.max_score,
+            'generations': 0,
+            'population_size': population_size,
+            'elapsed_seconds': round(time.perf_counter() - start_time, 4)
+        }
+    population_size = max(population_size, 2)
+    elite_count = max(1, population_size // 10)
+
+    # Half of the initial orders are largest-first, which is what the random solver uses
+    by_area = np.argsort(-scorer.areas, kind='stable')
+    orders = np.array([by_area if i % 2 == 0 else rng.permutation(count) for i in range(population_size)],
+                      dtype=np.int64).reshape(population_size, count)
+    # Rotating a square room changes nothing, so square rooms never carry a rotation flag
+    square = floor_plan.analyze_symmetries().square
+    rotatable = np.array([room.name not in square for room in floor_plan.rooms], dtype=bool)
+    rotations = (rng.random((population_size, count)) < 0.5) & rotatable
+    choices = rng.random((population_size, count))
+
+    best = None
+    generation = 0
+    for generation in range(1, generations + 1):
+        fitness, scores, utilization, dropped = scorer.score(orders, rotations, choices)
+
+        leader = int(np.argmax(fitness))
+        if best is None or fitness[leader] > best['fitness']:
+            best = {
+                'fitness': float(fitness[leader]),
+                'score': float(scores[leader]),
+                'utilization': float(utilization[leader]),
+                'dropped': int(dropped[leader]),
+                'order': orders[leader].copy(),
+                'rotation': rotations[leader].copy(),
+                'choice': choices[leader].copy()
+            }
+
+        if time.perf_counter() > deadline or count < 2:
+            break
+
+        elites = np.argsort(-fitness)[:elite_count]
+        offspring = population_size - elite_count
+
+        # Tournament selection of size three
+        entrants = rng.integers(0, population_size, size=(2 * offspring, 3))
+        winners = entrants[np.arange(2 * offspring), np.argmax(fitness[entrants], axis=1)]
+        mothers, fathers = winners[:offspring], winners[offspring:]
+
+        take_mother = rng.random((offspring, count)) < 0.5
+        child_rotations = np.where(take_mother, rotations[mothers], rotations[fathers])
+        child_choices = np.where(take_mother, choices[mothers], choices[fathers])
+        child_orders = np.array([_order_crossover(orders[m], orders[f], rng) for m, f in zip(mothers, fathers)],
+                                dtype=np.int64).reshape(offspring, count)
+
+        # Mutations: flip rotations, re-draw anchors and swap two rooms in the order
+        child_rotations ^= (rng.random((offspring, count)) < mutation_rate) & rotatable
+        redraw = rng.random((offspring, count)) < mutation_rate
+        child_choices = np.where(redraw, rng.random((offspring, count)), child_choices)
+        swapping = np.flatnonzero(rng.random(offspring) < 0.3)
+        if len(swapping):
+            first = rng.integers(0, count, size=len(swapping))
+            second = rng.integers(0, count, size=len(swapping))
+            first_rooms = child_orders[swapping, first]
+            child_orders[swapping, first] = child_orders[swapping, second]
+            child_orders[swapping, second] = first_rooms
+
+        orders = np.concatenate([orders[elites], child_orders])
+        rotations = np.concatenate([rotations[elites], child_rotations])
+        choices = np.concatenate([choices[elites], child_choices])
+
+    relocated = floor_plan.legalize_placement(
+        scorer.rects(best['rotation'], best['choice']),
+        best['rotation'].tolist(),
+        order=best['order'].tolist()
+    )
+
+    return {
+        'status': 'placed' if relocated is not None else 'unplaced',
+        'fitness': round(best['fitness'], 4),
+        'genome_score': round(best['score'], 4),
+        'genome_utilization': round(best['utilization'], 4),
+        'relocated_rooms': relocated,
+        'score': floor_plan.weighted_adjacency_score() if relocated is not None else None,
+        'max_score': scorer.max_score,
+        'generations': generation,
+        'population_size': population_size,
+        'elapsed_seconds': round(time.perf_counter() - start_time, 4)
+    }
@@ -0,0 +1,260 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+
+import networkx as nx
+
+from tabu import TabuSearch
+
+
+def partition_rooms(floor_plan, max_cluster_rooms=30):
+    """
+    Split the rooms into clusters of at most max_cluster_rooms rooms.
+
+    Clusters are the Louvain communities of the adjacency graph; communities that are too
+    large are bisected with Kernighan-Lin, and small leftovers (isolated rooms, tiny
+    communities) are packed together so they don't each claim their own sub-area.
+    """
+    graph = floor_plan.adjacency_graph
+    pending = [set(community) for community in
+               nx.community.louvain_communities(graph, seed=random.getrandbits(32))]
+
+    clusters = []
+    while pending:
+        cluster = pending.pop()
+        if len(cluster) <= max_cluster_rooms:
+            clusters.append(cluster)
+            continue
+        first, second = nx.community.kernighan_lin_bisection(graph.subgraph(cluster),
+                                                             seed=random.getrandbits(32))
+        pending.extend([set(first), set(second)])
+
+    large = [cluster for cluster in clusters if len(cluster) * 2 > max_cluster_rooms]
+    packed = []
+    for cluster in sorted((c for c in clusters if len(c) * 2 <= max_cluster_rooms), key=len, reverse=True):
+        target = next((bin_ for bin_ in packed if len(bin_) + len(cluster) <= max_cluster_rooms), None)
+        if target is None:
+            packed.append(set(cluster))
+        else:
+            target.update(cluster)
+
+    return large + packed
+
+
+def _cluster_order(floor_plan, clusters):
+    """Order clusters so that clusters with many links between them end up next to each other"""
+    cluster_of = {name: index for index, cluster in enumerate(clusters) for name in cluster}
+    links = {}
+    for u, v in floor_plan.adjacency_graph.edges:
+        a, b = cluster_of[u], cluster_of[v]
+        if a != b:
+            links[(a, b)] = links.get((a, b), 0) + 1
+            links[(b, a)] = links.get((b, a), 0) + 1
+
+    remaining = list(range(len(clusters)))
+    order = []
+    while remaining:
+        if order:
+            index = max(remaining, key=lambda c: (links.get((order[-1], c), 0),
+                                                  sum(links.get((o, c), 0) for o in order)))
+        else:
+            index = max(remaining, key=lambda c: len(clusters[c]))
+        remaining.remove(index)
+        order.append(index)
+
+    return [clusters[index] for index in order]
+
+
+def _cut(floor_plan, rect, share, unit):
+    """
+    Split rect across its longer side so that the first part holds share of its floor area.
+
+    Returns the two parts. The cut lies on a multiple of unit from the rect's edge.
+    """
+    x, y, width, height = rect
+    vertical = width >= height
+    length = width if vertical else height
+    target = share * floor_plan.region_index.covered_area(*rect)
+
+    def covered(steps):
+        if vertical:
+            return floor_plan.region_index.covered_area(x, y, steps * unit, height)
+        return floor_plan.region_index.covered_area(x, y, width, steps * unit)
+
+    # Covered area only grows with the cut position, so binary search the first position reaching target
+    low, high = 1, max(int(length / unit) - 1, 1)
+    while low < high:
+        middle = (low + high) // 2
+        if covered(middle) >= target:
+            high = middle
+        else:
+            low = middle + 1
+    offset = low * unit
+
+    if vertical:
+        return (x, y, offset, height), (x + offset, y, width - offset, height)
+    return (x, y, width, offset), (x, y + offset, width, height - offset)
+
+
+def assign_areas(floor_plan, clusters, areas, rect, unit):
+    """
+    Slice rect into one sub-area per cluster, in proportion to the cluster areas.
+
+    The clusters are split recursively into two groups of about equal area, and the rect
+    is cut across its longer side, so neighbouring clusters in the order get neighbouring
+    and roughly square sub-areas. Returns a list of (cluster, rect).
+    """
+    if len(clusters) <= 1:
+        return [(cluster, rect) for cluster in clusters]
+
+    total = sum(areas)
+    running = 0
+    split = 1
+    best_gap = None
+    for index in range(1, len(clusters)):
+        running += areas[index - 1]
+        gap = abs(total - 2 * running)
+        if best_gap is None or gap < best_gap:
+            best_gap, split = gap, index
+
+    first, second = _cut(floor_plan, rect, Fraction(sum(areas[:split]), total) if total else Fraction(1, 2), unit)
+    return assign_areas(floor_plan, clusters[:split], areas[:split], first, unit) + \
+        assign_areas(floor_plan, clusters[split:], areas[split:], second, unit)
+
+
+def _sub_plan(floor_plan, cluster, rect):
+    """Floor plan restricted to rect, holding the rooms of a cluster and the links between them"""
+    x, y, width, height = rect
+    regions = []
+    for region in floor_plan.region_index.rects:
+        left, right = max(x, region['x']), min(x + width, region['x'] + region['width'])
+        bottom, top = max(y, region['y']), min(y + height, region['y'] + region['height'])
+        if left < right and bottom < top:
+            regions.append({'x': left, 'y': bottom, 'width': right - left, 'height': top - bottom})
+
+    if not regions:
+        return None
+
+    sub_plan = type(floor_plan)(regions)
+    for room in floor_plan.rooms:
+        if room.name in cluster:
+            sub_plan.add_room(room.name, room.original_width, room.original_height, room.max_expansion)
+    for u, v, data in floor_plan.adjacency_graph.subgraph(cluster).edges(data=True):
+        sub_plan.add_adjacency(u, v, data.get('weight', 1), data.get('min_wall_length', 0))
+    sub_plan.set_objective(**floor_plan.objective_settings)
+    return sub_plan
+
+
+def _solve_cluster(sub_plan, max_attempts, repair_time_limit, seed):
+    """
+    Lay out one cluster and repair its own links with tabu search; runs in a worker process.
+
+    Returns ([(name, x, y, rotated)] or None when the cluster could not be placed, attempts).
+    """
+    random.seed(seed)
+    if sub_plan is None:
+        return None, 0
+    placed = sub_plan.place_rooms_with_constraints(max_attempts=max_attempts, enable_expansion=False)
+    attempts = sub_plan.solve_stats['attempts']
+    if not placed:
+        return None, attempts
+    if sub_plan.is_integral():
+        TabuSearch(sub_plan).run(time_limit=repair_time_limit)
+    return [(room.name, room.x, room.y, room.rotated) for room in sub_plan.rooms], attempts
+
+
+def solve_hierarchical(floor_plan, max_cluster_rooms=30, max_attempts=200, workers=None,
+                       repair_iterations=200, repair_time_limit=2.0):
+    """
+    Lay out a large plan cluster by cluster.
+
+    The adjacency graph is partitioned with partition_rooms, each cluster gets a slice of
+    the floor sized by its room area, and the clusters are solved independently in a
+    process pool, each one also repairing its own links with tabu search. The partial
+    layouts are stitched together, rooms of clusters that failed are moved into the free
+    space left over, and a last tabu search repairs the links between clusters (tabu
+    search only runs on plans with whole-number dimensions). The search runs before
+    expansion. Returns a report; the placement is applied when every room was placed.
+
+    The report's attempts are the random solver attempts of all clusters together, and
+    first_complete_seconds and best_seconds the times at which the stitched layout was
+    complete and at which the best layout was reached (after the last repair when it
+    improved the score).
+    """
+    start_time = time.perf_counter()
+    rooms_by_name = {room.name: room for room in floor_plan.rooms}
+
+    clusters = _cluster_order(floor_plan, partition_rooms(floor_plan, max_cluster_rooms))
+    areas = [sum(rooms_by_name[name].original_width * rooms_by_name[name].original_height for name in cluster)
+             for cluster in clusters]
+
+    origin_x = min(rect['x'] for rect in floor_plan.region_index.rects)
+    origin_y = min(rect['y'] for rect in floor_plan.region_index.rects)
+    bounds = (origin_x, origin_y, floor_plan.floor_width - origin_x, floor_plan.floor_height - origin_y)
+    unit = 1 if floor_plan.is_integral() else Fraction(1, 1000)
+
+    jobs = [(_sub_plan(floor_plan, cluster, rect), max_attempts, repair_time_limit, random.getrandbits(32))
+            for cluster, rect in assign_areas(floor_plan, clusters, areas, bounds, unit)]
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_solve_cluster, *zip(*jobs)))
+    else:
+        outcomes = [_solve_cluster(*job) for job in jobs]
+    results = [result for result, _ in outcomes]
+
+    for room in floor_plan.rooms:
+        room.x = None
+        room.y = None
+        room.rotated = False
+        room.reset_to_original_size()
+
+    for result in results:
+        for name, x, y, rotated in result or ():
+            room = rooms_by_name[name]
+            if rotated:
+                room.rotate()
+            room.x, room.y = x, y
+
+    leftovers = sorted((room for room in floor_plan.rooms if room.x is None), key=lambda r: r.get_area(),
+                       reverse=True)
+    free_space = floor_plan._free_space_for_placed_rooms()
+    placed = True
+    for room in leftovers:
+        if not floor_plan._place_with_heuristic(room, free_space, 'best_short_side_fit'):
+            placed = False
+            break
+        free_space.occupy(room.x, room.y, room.width, room.height)
+
+    report = {
+        'status': 'placed' if placed else 'unplaced',
+        'clusters': len(clusters),
+        'cluster_sizes': [len(cluster) for cluster in clusters],
+        'failed_clusters': sum(1 for result in results if result is None),
+        'relocated_rooms': [room.name for room in leftovers],
+        'workers': workers,
+        'attempts': sum(attempts for _, attempts in outcomes),
+        'first_complete_seconds': None,
+        'best_seconds': None
+    }
+
+    if not placed:
+        for room in floor_plan.rooms:
+            room.x = None
+            room.y = None
+    else:
+        report['first_complete_seconds'] = report['best_seconds'] = round(time.perf_counter() - start_time, 4)
+        if unit == 1:
+            report['stitched_score'] = floor_plan.weighted_adjacency_score()
+            report['repair'] = TabuSearch(floor_plan).run(max_iterations=repair_iterations,
+                                                          time_limit=repair_time_limit)
+            if report['repair']['score'] > report['repair']['initial_score']:
+                report['best_seconds'] = round(time.perf_counter() - start_time, 4)
+
+    report['score'] = floor_plan.weighted_adjacency_score() if placed else None
+    report['max_score'] = sum(max(weight, 0) for _, _, weight in floor_plan.adjacency_graph.edges.data('weight', 1))
+    report['elapsed_seconds'] = round(time.perf_counter() - start_time, 4)
+    return report
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class Objective:
+    """
+    Layout objective compiled into arrays once per solve.
+
+    value = sum of the weights of satisfied adjacencies
+            + utilization_weight * floor utilization (0 to 1)
+            - aspect_weight * sum of how far each room's aspect ratio exceeds max_aspect_ratio
+
+    An adjacency is satisfied when its rooms share a wall at least min_wall_length long
+    (any positive length when 0). evaluate() works on arrays of room edges of shape
+    (rooms,) for a single layout or (population, rooms) for a batch of layouts.
+    """
+
+    def __init__(self, floor_plan, utilization_weight=0.0, aspect_weight=0.0, max_aspect_ratio=2.0):
+        self.rooms = floor_plan.rooms
+        index_of = {room.name: i for i, room in enumerate(self.rooms)}
+        edges = list(floor_plan.adjacency_graph.edges(data=True))
+
+        self.edge_a = np.array([index_of[u] for u, _, _ in edges], dtype=np.int64)
+        self.edge_b = np.array([index_of[v] for _, v, _ in edges], dtype=np.int64)
+        self.weights = np.array([float(data.get('weight', 1)) for _, _, data in edges], dtype=np.float64)
+        self.min_walls = np.array([float(data.get('min_wall_length', 0)) for _, _, data in edges], dtype=np.float64)
+
+        self.floor_area = float(floor_plan.region_index.area)
+        self.utilization_weight = utilization_weight
+        self.aspect_weight = aspect_weight
+        self.max_aspect_ratio = max_aspect_ratio
+
+        # Best value any layout could reach; a solve can stop once it gets there.
+        # Adjacencies with negative weights are at best left unsatisfied
+        self.max_value = float(np.maximum(self.weights, 0).sum()) + max(utilization_weight, 0)
+
+    def evaluate(self, lefts, rights, bottoms, tops, placed):
+        """Return (objective values, satisfied edge masks, utilization) for the given layouts"""
+        a, b = self.edge_a, self.edge_b
+        left1, right1, bottom1, top1 = lefts[..., a], rights[..., a], bottoms[..., a], tops[..., a]
+        left2, right2, bottom2, top2 = lefts[..., b], rights[..., b], bottoms[..., b], tops[..., b]
+
+        # Same precedence as Room.shared_wall_length: vertical walls are checked first
+        vertical = (right1 == left2) | (right2 == left1)
+        horizontal = (top1 == bottom2) | (top2 == bottom1)
+        vertical_length = np.minimum(top1, top2) - np.maximum(bottom1, bottom2)
+        horizontal_length = np.minimum(right1, right2) - np.maximum(left1, left2)
+        length = np.where(vertical, vertical_length, np.where(horizontal, horizontal_length, 0))
+
+        satisfied = (length > 0) & (length >= self.min_walls) & placed[..., a] & placed[..., b]
+        value = (satisfied * self.weights).sum(axis=-1)
+
+        widths = rights - lefts
+        heights = tops - bottoms
+        utilization = np.where(placed, widths * heights, 0).sum(axis=-1) / self.floor_area \
+            if self.floor_area else np.zeros(value.shape)
+        value = value + self.utilization_weight * utilization
+
+        if self.aspect_weight:
+            aspect = np.maximum(widths, heights) / np.maximum(np.minimum(widths, heights), 1e-9)
+            excess = np.where(placed, np.maximum(aspect - self.max_aspect_ratio, 0), 0).sum(axis=-1)
+            value = value - self.aspect_weight * excess
+
+        return value, satisfied, utilization
+
+    def evaluate_rooms(self):
+        """Objective value of the rooms' current placement"""
+        placed = np.array([room.x is not None for room in self.rooms], dtype=bool)
+        edges = [room.get_boundaries() or (0, 0, 0, 0) for room in self.rooms]
+        lefts, rights, bottoms, tops = (np.array([float(edge[k]) for edge in edges], dtype=np.float64)
+                                        for k in range(4))
+        return float(self.evaluate(lefts, rights, bottoms, tops, placed)[0])
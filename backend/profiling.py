@@ -0,0 +1,94 @@
+import time
+
+
+# FloorPlan methods that get timed, as (method, phase, test of the result for a rejection)
+FLOOR_PLAN_PHASES = (
+    ('_place_from_anchors', 'sampling', lambda placed: not placed),
+    ('_place_with_heuristic', 'free_space', lambda placed: not placed),
+    ('check_overlap', 'check_overlap', lambda overlaps: overlaps),
+    ('is_within_floor', 'is_within_floor', lambda inside: not inside),
+    ('expand_rooms', 'expand_rooms', None),
+    ('evaluate_adjacency_score', 'scoring', None)
+)
+
+
+class PerfReport:
+    """
+    Per-phase call counts, rejection counts and seconds of a profiled solve.
+
+    Phases nest: sampling time includes the check_overlap calls it makes, so phase times
+    don't add up to elapsed_seconds.
+    """
+
+    def __init__(self, phases, elapsed_seconds):
+        self.phases = phases
+        self.elapsed_seconds = elapsed_seconds
+
+    def to_dict(self):
+        return {
+            'elapsed_seconds': round(self.elapsed_seconds, 6),
+            'phases': {
+                phase: {'calls': stats['calls'], 'rejections': stats['rejections'],
+                        'seconds': round(stats['seconds'], 6)}
+                for phase, stats in self.phases.items()
+            }
+        }
+
+    def __str__(self):
+        lines = [f"{'phase':<16}{'calls':>10}{'rejections':>12}{'seconds':>12}"]
+        for phase, stats in sorted(self.phases.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{phase:<16}{stats['calls']:>10}{stats['rejections']:>12}{stats['seconds']:>12.4f}")
+        lines.append(f"{'elapsed':<16}{'':>10}{'':>12}{self.elapsed_seconds:>12.4f}")
+        return '\n'.join(lines)
+
+
+class PhaseProfiler:
+    """
+    Times solver phases by wrapping methods on individual objects.
+
+    Wrappers are set as instance attributes, so they shadow the class methods only on the
+    profiled floor plans, and detach() deletes them again. Objects that are not profiled
+    run the plain methods: profiling costs nothing when it is off.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.start_time = time.perf_counter()
+        self.attached = []
+
+    def instrument(self, obj, method_name, phase, rejected=None):
+        """Count and time calls of obj.method_name under phase"""
+        method = getattr(obj, method_name)
+        stats = self.phases.setdefault(phase, {'calls': 0, 'rejections': 0, 'seconds': 0.0})
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            stats['seconds'] += clock() - start
+            stats['calls'] += 1
+            if rejected is not None and rejected(result):
+                stats['rejections'] += 1
+            return result
+
+        setattr(obj, method_name, timed)
+        self.attached.append((obj, method_name))
+
+    def attach(self, floor_plan):
+        """Profile a floor plan's solver phases"""
+        for method_name, phase, rejected in FLOOR_PLAN_PHASES:
+            self.instrument(floor_plan, method_name, phase, rejected)
+        floor_plan.profiler = self
+
+    def detach(self):
+        """Remove every wrapper and return the report"""
+        for obj, method_name in reversed(self.attached):
+            obj.__dict__.pop(method_name, None)
+            if getattr(obj, 'profiler', None) is self:
+                obj.profiler = None
+        self.attached = []
+        return self.report()
+
+    def report(self):
+        return PerfReport({phase: dict(stats) for phase, stats in self.phases.items()},
+                          time.perf_counter() - self.start_time)
@@ -0,0 +1,136 @@
+from bisect import bisect_right
+
+
+def _merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals into a sorted disjoint list"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_intervals(intervals, holes):
+    """Remove merged hole intervals from sorted disjoint intervals"""
+    result = []
+    for start, end in intervals:
+        for hole_start, hole_end in holes:
+            if hole_end <= start or hole_start >= end:
+                continue
+            if hole_start > start:
+                result.append((start, hole_start))
+            start = max(start, hole_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+class RegionIndex:
+    """
+    Canonical form of a floor given as regions that may overlap, touch or repeat.
+
+    The floor is cut into vertical slabs at every region x edge, and each slab keeps the
+    sorted, merged y intervals it covers. A point lookup is two binary searches; a
+    rectangle lookup is the same plus one step per slab the rectangle spans. rects holds
+    the same floor as disjoint rectangles, with every y interval extended across all
+    consecutive slabs that contain it.
+
+    holes are rectangles cut out of the floor (fixed obstacles); they are removed from
+    the slabs once here, so every lookup skips them for free. area is the floor area left
+    after that and blocked_area the floor area the holes cover.
+    """
+
+    def __init__(self, floor_regions, holes=()):
+        regions = [region for region in floor_regions if region['width'] > 0 and region['height'] > 0]
+        holes = [hole for hole in holes if hole['width'] > 0 and hole['height'] > 0]
+        self.xs = sorted({region['x'] for region in regions} |
+                         {region['x'] + region['width'] for region in regions} |
+                         {hole['x'] for hole in holes} | {hole['x'] + hole['width'] for hole in holes})
+
+        self.slabs = []
+        self.blocked_area = 0
+        for left, right in zip(self.xs, self.xs[1:]):
+            covered = _merge_intervals(
+                (region['y'], region['y'] + region['height']) for region in regions
+                if region['x'] <= left and region['x'] + region['width'] >= right
+            )
+            blocked = _merge_intervals(
+                (hole['y'], hole['y'] + hole['height']) for hole in holes
+                if hole['x'] <= left and hole['x'] + hole['width'] >= right
+            )
+            intervals = _subtract_intervals(covered, blocked)
+            self.slabs.append((intervals, [start for start, _ in intervals]))
+            self.blocked_area += (right - left) * (sum(end - start for start, end in covered) -
+                                                   sum(end - start for start, end in intervals))
+
+        self.rects = self._merge_slabs()
+        self.area = sum(rect['width'] * rect['height'] for rect in self.rects)
+
+    def _merge_slabs(self):
+        rects = []
+        open_rects = {}
+        for i, (intervals, _) in enumerate(self.slabs):
+            left = self.xs[i]
+            still_open = {}
+            for interval in intervals:
+                still_open[interval] = open_rects.pop(interval, left)
+            for (bottom, top), start in open_rects.items():
+                rects.append({'x': start, 'y': bottom, 'width': left - start, 'height': top - bottom})
+            open_rects = still_open
+
+        if self.xs:
+            for (bottom, top), start in open_rects.items():
+                rects.append({'x': start, 'y': bottom, 'width': self.xs[-1] - start, 'height': top - bottom})
+
+        return sorted(rects, key=lambda rect: (rect['x'], rect['y']))
+
+    def _slab_at(self, x):
+        index = bisect_right(self.xs, x) - 1
+        return index if 0 <= index < len(self.slabs) else None
+
+    @staticmethod
+    def _interval_at(slab, y):
+        intervals, starts = slab
+        index = bisect_right(starts, y) - 1
+        return intervals[index] if index >= 0 else None
+
+    def contains_point(self, x, y):
+        index = self._slab_at(x)
+        if index is None:
+            return False
+        interval = self._interval_at(self.slabs[index], y)
+        return interval is not None and y < interval[1]
+
+    def contains_rect(self, x, y, width, height):
+        """Check if a rectangle lies fully on the floor"""
+        if width <= 0 or height <= 0:
+            return True
+
+        index = self._slab_at(x)
+        if index is None:
+            return False
+
+        while True:
+            interval = self._interval_at(self.slabs[index], y)
+            if interval is None or interval[1] < y + height:
+                return False
+            if self.xs[index + 1] >= x + width:
+                return True
+            index += 1
+            if index == len(self.slabs):
+                return False
+
+    def covered_area(self, x, y, width, height):
+        """Area of a rectangle that lies on the floor"""
+        area = 0
+        for rect in self.rects:
+            overlap_x = min(x + width, rect['x'] + rect['width']) - max(x, rect['x'])
+            overlap_y = min(y + height, rect['y'] + rect['height']) - max(y, rect['y'])
+            if overlap_x > 0 and overlap_y > 0:
+                area += overlap_x * overlap_y
+        return area
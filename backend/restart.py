@@ -0,0 +1,61 @@
+import math
+
+
+class RestartController:
+    """
+    Adapts the random solver's attempt loop to what it observes.
+
+    Stagnation: the solve stops once stagnation_window attempts in a row have not improved
+    the best objective value (None or 0, the default, never stops early). It only counts
+    after the first complete layout, so a hard plan keeps trying until it finds one.
+    Stopping early trades quality for latency, so callers have to opt in.
+
+    Sampling budget: every anchor sampling call reports how many anchors it tried and
+    whether one was free. The per-try hit rate estimates how many tries a room needs, and
+    every adapt_every calls the budget is set to cover about 95% of successful placements
+    (3 / hit rate tries), kept between min_budget and max_budget. Frequent rejections raise
+    the budget; easy floors lower it so misses reach the free-space fallback sooner.
+    """
+
+    def __init__(self, sample_budget, stagnation_window=0, min_budget=10, max_budget=None, adapt_every=200):
+        self.sample_budget = sample_budget
+        self.stagnation_window = stagnation_window
+        self.min_budget = min_budget
+        self.max_budget = max_budget or 4 * sample_budget
+        self.adapt_every = adapt_every
+
+        self.attempts = 0
+        self.complete = 0
+        self.since_improvement = 0
+        self.sampling_calls = 0
+        self.sampling_tries = 0
+        self.sampling_hits = 0
+
+    def record_sampling(self, tries, placed):
+        self.sampling_calls += 1
+        self.sampling_tries += tries
+        self.sampling_hits += 1 if placed else 0
+        if self.sampling_calls % self.adapt_every == 0:
+            hit_rate = self.sampling_hits / self.sampling_tries if self.sampling_tries else 1.0
+            budget = math.ceil(3 / hit_rate) if hit_rate > 0 else self.max_budget
+            self.sample_budget = min(max(budget, self.min_budget), self.max_budget)
+
+    def record_attempt(self, complete, improved):
+        self.attempts += 1
+        if complete:
+            self.complete += 1
+        if improved:
+            self.since_improvement = 0
+        elif self.complete:
+            self.since_improvement += 1
+
+    def should_stop(self):
+        """Check if the best value has plateaued for the whole stagnation window"""
+        return bool(self.stagnation_window) and self.since_improvement >= self.stagnation_window
+
+    def report(self):
+        return {
+            'placement_rate': round(self.complete / self.attempts, 4) if self.attempts else 0.0,
+            'sample_budget': self.sample_budget,
+            'stopped_early': self.should_stop()
+        }
@@ -0,0 +1,186 @@
+import math
+import random
+import time
+
+from exact_solver import edge_requirements, satisfies
+
+
+# Cost of one unit of room area lying outside the floor, relative to one unit of missed adjacency weight
+OUT_OF_FLOOR_WEIGHT = 1.0
+
+
+def _prefix_max_tree(size):
+    return [0] * (size + 1)
+
+
+def _tree_update(tree, index, value):
+    """Raise position index (1-based) of a Fenwick prefix-maximum tree to value"""
+    while index < len(tree):
+        if tree[index] < value:
+            tree[index] = value
+        index += index & -index
+
+
+def _tree_query(tree, index):
+    """Maximum over positions 1..index of a Fenwick prefix-maximum tree"""
+    best = 0
+    while index > 0:
+        if tree[index] > best:
+            best = tree[index]
+        index -= index & -index
+    return best
+
+
+def pack(positive, negative, widths, heights):
+    """
+    Decode a sequence pair into bottom-left packed coordinates.
+
+    Room a is left of room b when a comes before b in both sequences, and below b when
+    a comes after b in positive but before it in negative. Coordinates are the longest
+    weighted common subsequences, computed with a Fenwick tree in O(n log n).
+    """
+    count = len(positive)
+    rank = [0] * count
+    for index, room in enumerate(negative):
+        rank[room] = index
+
+    xs = [0] * count
+    tree = _prefix_max_tree(count)
+    for room in positive:
+        xs[room] = _tree_query(tree, rank[room])
+        _tree_update(tree, rank[room] + 1, xs[room] + widths[room])
+
+    ys = [0] * count
+    tree = _prefix_max_tree(count)
+    for room in reversed(positive):
+        ys[room] = _tree_query(tree, rank[room])
+        _tree_update(tree, rank[room] + 1, ys[room] + heights[room])
+
+    return xs, ys
+
+
+def solve_sequence_pair(floor_plan, iterations=20000, time_limit=10.0):
+    """
+    Simulated annealing over sequence pairs.
+
+    A layout is two permutations of the rooms plus a rotation flag per room. Moves swap
+    two rooms in one or both sequences or rotate a room; moves that only lead to an
+    equivalent layout (rotating a square room, swapping interchangeable rooms) are not
+    drawn. Every candidate is decoded with pack() at the floor's bottom-left corner and
+    costed by the weight of missed adjacencies plus the room area that falls outside the
+    floor. The best layout is then fitted to the floor: rooms lying fully on the floor
+    keep their packed positions and the rest are moved into free space. Returns a
+    report; the placement is applied to the rooms when every room could be fitted.
+    """
+    start_time = time.perf_counter()
+    deadline = start_time + time_limit
+    rooms = floor_plan.rooms
+    count = len(rooms)
+    index_of = {room.name: i for i, room in enumerate(rooms)}
+    requirements = edge_requirements(floor_plan.adjacency_graph, index_of)
+    edges = [(index_of[u], index_of[v]) + requirements[(index_of[u], index_of[v])]
+             for u, v in floor_plan.adjacency_graph.edges]
+    max_score = sum(max(weight, 0) for _, _, weight, _ in edges)
+
+    symmetries = floor_plan.analyze_symmetries()
+    rotatable = [i for i, room in enumerate(rooms) if room.name not in symmetries.square]
+
+    def draw_pair():
+        """Two rooms that are not interchangeable, or None when a few draws find none"""
+        for _ in range(8):
+            a, b = random.sample(range(count), 2)
+            if not symmetries.interchangeable(rooms[a].name, rooms[b].name):
+                return a, b
+        return None
+
+    _, summed, (origin_x, origin_y) = floor_plan._get_floor_mask()
+    grid_height, grid_width = summed.shape[0] - 1, summed.shape[1] - 1
+
+    def floor_cells(x, y, width, height):
+        """Floor cells covered by a rectangle given in grid coordinates"""
+        left, right = max(x, 0), min(x + width, grid_width)
+        bottom, top = max(y, 0), min(y + height, grid_height)
+        if left >= right or bottom >= top:
+            return 0
+        return int(summed[top, right] - summed[bottom, right] - summed[top, left] + summed[bottom, left])
+
+    def evaluate(positive, negative, rotations):
+        widths = [room.original_height if rotated else room.original_width
+                  for room, rotated in zip(rooms, rotations)]
+        heights = [room.original_width if rotated else room.original_height
+                   for room, rotated in zip(rooms, rotations)]
+        xs, ys = pack(positive, negative, widths, heights)
+
+        outside = sum(widths[i] * heights[i] - floor_cells(xs[i], ys[i], widths[i], heights[i])
+                      for i in range(count))
+        rects = [(xs[i], ys[i], widths[i], heights[i]) for i in range(count)]
+        score = sum(weight for a, b, weight, min_wall_length in edges
+                    if satisfies(rects[a], rects[b], min_wall_length))
+
+        return max_score - score + OUT_OF_FLOOR_WEIGHT * outside, score, outside, rects
+
+    positive = list(range(count))
+    random.shuffle(positive)
+    negative = list(range(count))
+    random.shuffle(negative)
+    rotations = [i in rotatable and random.random() > 0.5 for i in range(count)]
+
+    cost, score, outside, rects = evaluate(positive, negative, rotations)
+    best = (cost, score, outside, rects, list(rotations))
+    temperature = max(cost, 1.0) / 2
+    cooling = (0.01 / temperature) ** (1.0 / max(iterations, 1)) if temperature > 0.01 else 1.0
+
+    performed = 0
+    for performed in range(1, iterations + 1):
+        if count < 2 or best[0] == 0:
+            break
+        if performed % 256 == 0 and time.perf_counter() > deadline:
+            break
+
+        new_positive, new_negative, new_rotations = positive, negative, rotations
+        move = random.random()
+        pair = draw_pair() if move < 0.85 or not rotatable else None
+        if pair is None and not rotatable:
+            pair = random.sample(range(count), 2)
+        if pair is None:
+            new_rotations = list(rotations)
+            i = random.choice(rotatable)
+            new_rotations[i] = not new_rotations[i]
+        elif move < 0.3:
+            new_positive = list(positive)
+            i, j = positive.index(pair[0]), positive.index(pair[1])
+            new_positive[i], new_positive[j] = new_positive[j], new_positive[i]
+        elif move < 0.6:
+            new_negative = list(negative)
+            i, j = negative.index(pair[0]), negative.index(pair[1])
+            new_negative[i], new_negative[j] = new_negative[j], new_negative[i]
+        else:
+            # Swapping the same two rooms in both sequences exchanges their places
+            a, b = pair
+            new_positive = [b if r == a else a if r == b else r for r in positive]
+            new_negative = [b if r == a else a if r == b else r for r in negative]
+
+        new = evaluate(new_positive, new_negative, new_rotations)
+        delta = new[0] - cost
+        if delta <= 0 or random.random() < math.exp(-delta / temperature):
+            positive, negative, rotations = new_positive, new_negative, new_rotations
+            cost, score, outside, rects = new
+            if cost < best[0]:
+                best = (cost, score, outside, rects, list(rotations))
+
+        temperature *= cooling
+
+    _, packed_score, packed_outside, best_rects, best_rotations = best
+    fitted = floor_plan.legalize_placement(
+        [(x + origin_x, y + origin_y, w, h) for x, y, w, h in best_rects], best_rotations)
+
+    return {
+        'status': 'placed' if fitted is not None else 'unplaced',
+        'packed_score': packed_score,
+        'packed_outside_area': packed_outside,
+        'relocated_rooms': fitted,
+        'score': floor_plan.weighted_adjacency_score() if fitted is not None else None,
+        'max_score': max_score,
+        'iterations': performed,
+        'elapsed_seconds': round(time.perf_counter() - start_time, 4)
+    }
@@ -0,0 +1,56 @@
+class Symmetries:
+    """
+    Symmetries of a floor plan that leave the objective unchanged.
+
+    square holds the rooms whose rotation changes nothing. groups holds sets of
+    interchangeable rooms: rooms of the same size (either orientation) and maximum
+    expansion whose adjacencies go to the same other rooms with the same weights and
+    minimum wall lengths. Swapping two interchangeable rooms gives an equivalent layout,
+    so search engines only need to explore one layout of each such set.
+    """
+
+    def __init__(self, floor_plan):
+        graph = floor_plan.adjacency_graph
+        self.square = {room.name for room in floor_plan.rooms if room.original_width == room.original_height}
+
+        def signature(room):
+            return (min(room.original_width, room.original_height),
+                    max(room.original_width, room.original_height),
+                    room.max_expansion)
+
+        def links(room, other):
+            return {
+                name: (data.get('weight', 1), data.get('min_wall_length', 0))
+                for name, data in graph[room.name].items() if name != other.name
+            }
+
+        self.groups = []
+        for room in floor_plan.rooms:
+            group = next((group for group in self.groups
+                          if signature(group[0]) == signature(room) and
+                          links(group[0], room) == links(room, group[0])), None)
+            if group is None:
+                self.groups.append([room])
+            else:
+                group.append(room)
+
+        self.groups = [[room.name for room in group] for group in self.groups if len(group) > 1]
+        self.group_of = {name: index for index, group in enumerate(self.groups) for name in group}
+
+    def interchangeable(self, first, second):
+        """Check if two rooms, given by name, can swap places without changing the objective"""
+        group = self.group_of.get(first)
+        return group is not None and group == self.group_of.get(second)
+
+    def canonical_key(self, rooms):
+        """
+        Fingerprint of the rooms' current rectangles, equal for layouts that only differ by
+        rotating square rooms or by swapping interchangeable rooms
+        """
+        rects = {room.name: (room.x, room.y, room.width, room.height) for room in rooms}
+        key = [rects[room.name] for room in rooms if room.name not in self.group_of]
+        key.extend(tuple(sorted(rects[name] for name in group)) for group in self.groups)
+        return tuple(key)
+
+    def to_dict(self):
+        return {'square_rooms': sorted(self.square), 'interchangeable_groups': self.groups}
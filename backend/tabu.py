@@ -0,0 +1,145 @@
+import random
+import time
+from collections import deque
+
+from exact_solver import wall_positions
+
+
+class TabuSearch:
+    """
+    Repair missed adjacencies of a finished layout with tabu search.
+
+    Moves are: slide a room to a position along the wall of one of its adjacency
+    neighbours, swap two rooms of the same size (unless they are interchangeable, which
+    changes nothing), or rotate a room in place. Every
+    iteration applies the best legal move that isn't tabu (even if it makes the score
+    worse), and the moved rooms become tabu for a number of iterations so the search
+    doesn't cycle. A tabu move is still allowed when it reaches a new best score.
+    """
+
+    def __init__(self, floor_plan, tabu_tenure=7, max_candidates=200):
+        self.floor_plan = floor_plan
+        self.tabu_tenure = tabu_tenure
+        self.max_candidates = max_candidates
+        self.rooms_by_name = {room.name: room for room in floor_plan.rooms}
+        # (room, room, weight, min_wall_length) per adjacency
+        self.edges = [(self.rooms_by_name[u], self.rooms_by_name[v], data.get('weight', 1),
+                       data.get('min_wall_length', 0))
+                      for u, v, data in floor_plan.adjacency_graph.edges(data=True)]
+        self.max_score = sum(max(weight, 0) for _, _, weight, _ in self.edges)
+        self.symmetries = floor_plan.analyze_symmetries()
+
+    @staticmethod
+    def _satisfied(a, b, min_wall_length):
+        length = a.shared_wall_length(b)
+        return length > 0 and length >= min_wall_length
+
+    def score(self):
+        """Summed weight of the adjacencies whose rooms share a long enough wall"""
+        return sum(weight for a, b, weight, min_wall_length in self.edges
+                   if self._satisfied(a, b, min_wall_length))
+
+    def _is_legal(self, room, x, y, width, height):
+        return self.floor_plan.is_within_floor(x, y, width, height) and \
+            not self.floor_plan.check_overlap(room, x, y, width, height)
+
+    def candidate_moves(self):
+        """Legal moves as (kind, rooms, data) tuples"""
+        moves = []
+        unsatisfied = [(a, b) for a, b, weight, min_wall_length in self.edges
+                       if weight > 0 and not self._satisfied(a, b, min_wall_length)]
+
+        # Slide either room of a missed edge along the other's walls
+        for a, b in unsatisfied:
+            for room, anchor in ((a, b), (b, a)):
+                rect = (anchor.x, anchor.y, anchor.width, anchor.height)
+                for x, y in wall_positions(room.width, room.height, rect):
+                    if self._is_legal(room, x, y, room.width, room.height):
+                        moves.append(('slide', (room,), (x, y)))
+
+        # Swap rooms of identical current size
+        placed = [room for room in self.floor_plan.rooms if room.x is not None]
+        for i, a in enumerate(placed):
+            for b in placed[i + 1:]:
+                if (a.width, a.height) == (b.width, b.height) and \
+                        not self.symmetries.interchangeable(a.name, b.name):
+                    moves.append(('swap', (a, b), None))
+
+        # Rotate in place
+        for room in placed:
+            if room.width != room.height and \
+                    self._is_legal(room, room.x, room.y, room.height, room.width):
+                moves.append(('rotate', (room,), None))
+
+        if len(moves) > self.max_candidates:
+            moves = random.sample(moves, self.max_candidates)
+        return moves
+
+    def apply(self, move):
+        """Apply a move and return the data needed to undo it"""
+        kind, rooms, data = move
+        if kind == 'slide':
+            room = rooms[0]
+            undo = (room.x, room.y)
+            room.x, room.y = data
+            return undo
+        if kind == 'swap':
+            a, b = rooms
+            a.x, a.y, b.x, b.y = b.x, b.y, a.x, a.y
+            return None
+        rooms[0].rotate()
+        return None
+
+    def undo(self, move, undo):
+        kind, rooms, _ = move
+        if kind == 'slide':
+            rooms[0].x, rooms[0].y = undo
+        else:
+            self.apply(move)
+
+    def run(self, max_iterations=200, time_limit=2.0):
+        """Search from the current placement and leave the best placement found applied"""
+        start_time = time.perf_counter()
+        deadline = start_time + time_limit
+        initial_score = self.score()
+        best_score = initial_score
+        best_placement = self.floor_plan.snapshot_placement()
+        tabu = deque(maxlen=self.tabu_tenure)
+
+        iteration = 0
+        for iteration in range(1, max_iterations + 1):
+            if best_score >= self.max_score or time.perf_counter() > deadline:
+                break
+
+            chosen = None
+            chosen_score = None
+            for move in self.candidate_moves():
+                undo = self.apply(move)
+                score = self.score()
+                self.undo(move, undo)
+
+                is_tabu = any(room.name in tabu for room in move[1])
+                if is_tabu and score <= best_score:
+                    continue
+                if chosen_score is None or score > chosen_score:
+                    chosen, chosen_score = move, score
+
+            if chosen is None:
+                break
+
+            self.apply(chosen)
+            tabu.extend(room.name for room in chosen[1])
+
+            if chosen_score > best_score:
+                best_score = chosen_score
+                best_placement = self.floor_plan.snapshot_placement()
+
+        self.floor_plan.apply_placement(best_placement)
+
+        return {
+            'initial_score': initial_score,
+            'score': best_score,
+            'max_score': self.max_score,
+            'iterations': iteration,
+            'elapsed_seconds': round(time.perf_counter() - start_time, 4)
+        }
@@ -0,0 +1,12 @@
+from app import FloorPlan
+
+
+def test_floor_mask_clips_obstacles_partly_outside_the_floor():
+    floor_plan = FloorPlan([{'x': 0, 'y': 0, 'width': 10, 'height': 10}],
+                           obstacles=[{'x': -5, 'y': 2, 'width': 7, 'height': 3},
+                                      {'x': -5, 'y': -5, 'width': 3, 'height': 3}])
+
+    mask, _, _ = floor_plan._get_floor_mask()
+    assert mask.sum() == 100 - 2 * 3
+    assert mask.sum() == floor_plan.region_index.area
+    assert not mask[2:5, 0:2].any()
@@ -0,0 +1,20 @@
+from app import FloorPlan
+from archive import ParetoArchive
+
+
+def test_pareto_archive_drops_crowded_layouts_past_max_size(monkeypatch):
+    floor_plan = FloorPlan([{'x': 0, 'y': 0, 'width': 10, 'height': 10}])
+    floor_plan.add_room('A', 2, 2)
+
+    # Trading adjacency score against utilization keeps every layout on the front
+    fronts = iter([(score, 100 - score, 0) for score in range(8)])
+    monkeypatch.setattr(ParetoArchive, '_metrics', staticmethod(lambda plan: next(fronts)))
+
+    archive = ParetoArchive(max_size=5)
+    for _ in range(8):
+        assert archive.offer(floor_plan, 0.0)
+
+    scores = [entry['adjacency_score'] for entry in archive.to_list()]
+    assert len(scores) == 5
+    # The ends of the front are never dropped
+    assert scores[0] == 7 and scores[-1] == 0
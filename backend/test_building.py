@@ -0,0 +1,32 @@
+from app import FloorPlan, parse_layout_options, solve_layout
+from building import Building
+
+
+def _building():
+    building = Building()
+    for name in ('Ground', 'First'):
+        # Two 2x4 rooms fill the 4x4 floor and always share a wall, so every layout scores the same
+        floor_plan = building.add_floor(name, FloorPlan([{'x': 0, 'y': 0, 'width': 4, 'height': 4}]))
+        floor_plan.add_room('A', 2, 4, max_expansion=0)
+        floor_plan.add_room('B', 2, 4, max_expansion=0)
+        floor_plan.add_adjacency('A', 'B')
+    return building
+
+
+def test_worker_solves_keep_the_objective_settings():
+    options, error = parse_layout_options({'utilization_weight': 5.0, 'max_attempts': 20})
+    assert error is None
+
+    statistics = {}
+    for workers in (1, 2):
+        building = _building()
+        success, _ = building.solve(solve_layout, options, workers=workers)
+        assert success
+        statistics[workers] = [
+            {key: floor_plan.get_statistics()[key]
+             for key in ('objective', 'objective_max', 'utilization_percentage', 'adjacency_score')}
+            for _, floor_plan in building.floors
+        ]
+
+    assert statistics[2] == statistics[1]
+    assert statistics[2][0]['objective'] == 6.0
@@ -0,0 +1,56 @@
+import itertools
+import random
+
+from app import FloorPlan
+from exact_solver import satisfies, solve_exact
+
+
+def _random_plan(rnd):
+    floor_plan = FloorPlan([{'x': 0, 'y': 0, 'width': 4, 'height': 3},
+                            {'x': 0, 'y': 3, 'width': 2, 'height': 1}])
+    names = ['A', 'B', 'C', 'D'][:rnd.randint(2, 4)]
+    for name in names:
+        floor_plan.add_room(name, rnd.randint(1, 2), rnd.randint(1, 2))
+    for first, second in itertools.combinations(names, 2):
+        if rnd.random() < 0.6:
+            floor_plan.add_adjacency(first, second, weight=rnd.choice([-2, -1, 1, 2]))
+    return floor_plan
+
+
+def _brute_force_score(floor_plan):
+    """Best weighted adjacency score over every placement of the rooms, or None when none fits"""
+    options = []
+    for room in floor_plan.rooms:
+        sizes = {(room.original_width, room.original_height), (room.original_height, room.original_width)}
+        options.append([(x, y, width, height) for width, height in sizes
+                        for x in range(floor_plan.floor_width) for y in range(floor_plan.floor_height)
+                        if floor_plan.is_within_floor(x, y, width, height)])
+
+    index_of = {room.name: i for i, room in enumerate(floor_plan.rooms)}
+    edges = [(index_of[u], index_of[v], data['weight'])
+             for u, v, data in floor_plan.adjacency_graph.edges(data=True)]
+
+    best = None
+    for rects in itertools.product(*options):
+        if any(a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+               for a, b in itertools.combinations(rects, 2)):
+            continue
+        score = sum(weight for u, v, weight in edges if satisfies(rects[u], rects[v]))
+        if best is None or score > best:
+            best = score
+    return best
+
+
+def test_exact_solver_matches_brute_force_with_negative_weights():
+    rnd = random.Random(7)
+    for _ in range(60):
+        floor_plan = _random_plan(rnd)
+        report = solve_exact(floor_plan, time_limit=30.0)
+        expected = _brute_force_score(floor_plan)
+
+        if expected is None:
+            assert report['status'] == 'infeasible'
+            continue
+        assert report['status'] == 'optimal'
+        assert report['score'] == expected
+        assert floor_plan.weighted_adjacency_score() == expected
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class TraceRecorder:
+    """
+    Records the timeline of a solve as Chrome trace events.
+
+    Spans are opened with begin() and closed with end() and are written as complete ('X')
+    events when they close, so spans opened inside another span nest under it in a trace
+    viewer (chrome://tracing, Perfetto). instant() marks a moment and counter() plots a
+    value over time. Events go into a ring buffer of max_events: on long solves the oldest
+    events are dropped and counted instead of using more memory.
+    """
+
+    def __init__(self, max_events=100000):
+        self.events = deque(maxlen=max_events)
+        self.recorded = 0
+        self.stack = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+
+    def now(self):
+        """Microseconds since the recorder was created"""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def _emit(self, event):
+        event.update(pid=self.pid, tid=self.tid)
+        self.events.append(event)
+        self.recorded += 1
+
+    def begin(self, name, category, **args):
+        self.stack.append((name, category, self.now(), args))
+
+    def end(self, **args):
+        """Close the innermost open span, adding args to it"""
+        name, category, start, span_args = self.stack.pop()
+        self._emit({'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': self.now() - start,
+                    'args': {**span_args, **args}})
+
+    def end_until(self, name, **args):
+        """Close open spans up to and including the innermost one called name; args go to that one"""
+        if not any(span[0] == name for span in self.stack):
+            return
+        while self.stack[-1][0] != name:
+            self.end()
+        self.end(**args)
+
+    def instant(self, name, category, **args):
+        self._emit({'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': self.now(), 'args': args})
+
+    def counter(self, name, **values):
+        self._emit({'name': name, 'ph': 'C', 'ts': self.now(), 'args': values})
+
+    @property
+    def dropped(self):
+        return self.recorded - len(self.events)
+
+    def to_dict(self):
+        """Trace in the Chrome trace-event JSON object format"""
+        return {
+            'traceEvents': sorted(self.events, key=lambda event: event['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {'recorded_events': self.recorded, 'dropped_events': self.dropped}
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
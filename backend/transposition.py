@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    """
+    Bounded map from layout fingerprints to the objective value they led to.
+
+    Random attempts on small floors keep landing on the same placement; looking the
+    fingerprint up first lets a solve skip expanding and scoring a layout it has already
+    seen. Once full, the least recently seen fingerprint is evicted.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(rooms, symmetries=None):
+        """
+        Key of the rooms' positions and orientations; with symmetries, layouts that are
+        equivalent under them share a key
+        """
+        if symmetries is not None:
+            return symmetries.canonical_key(rooms)
+        return tuple((room.x, room.y, room.rotated) for room in rooms)
+
+    def lookup(self, key):
+        """Return the value stored for key, or None when it hasn't been seen"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def store(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
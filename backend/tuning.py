@@ -0,0 +1,167 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solver_profiles.json')
+
+# Values the random solver used before profiles existed; every profile starts from them
+DEFAULT_PROFILE = {
+    'tries_per_region': 100,
+    'rotation_probability': 0.5,
+    'max_attempts': 1000,
+    'max_expansion': 20
+}
+
+# (name, most rooms, most floor area); a problem belongs to the first class it fits
+SIZE_CLASSES = (
+    ('small', 8, 400),
+    ('medium', 30, 3000),
+    ('large', float('inf'), float('inf'))
+)
+
+SEARCH_SPACE = {
+    'tries_per_region': (25, 50, 100, 200),
+    'rotation_probability': (0.25, 0.5, 0.75),
+    'max_attempts': (250, 500, 1000, 2000),
+    'max_expansion': (5, 10, 20, 40)
+}
+
+# Rooms per benchmark problem of each class
+CLASS_ROOM_COUNTS = {'small': (4, 8), 'medium': (12, 30), 'large': (40, 60)}
+
+_profiles = None
+
+
+def size_class(room_count, floor_area):
+    return next(name for name, max_rooms, max_area in SIZE_CLASSES
+                if room_count <= max_rooms and floor_area <= max_area)
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Tuned profiles by size class, or an empty dict when none were stored"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_profiles(profiles, path=PROFILES_PATH):
+    with open(path, 'w') as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+
+
+def profile_for(room_count, floor_area):
+    """Solver parameters for a problem of this size: DEFAULT_PROFILE overridden by the stored profile"""
+    global _profiles
+    if _profiles is None:
+        _profiles = load_profiles()
+    name = size_class(room_count, floor_area)
+    return {**DEFAULT_PROFILE, **_profiles.get(name, {}), 'size_class': name}
+
+
+def generate_problem(floor_plan_class, class_name, seed):
+    """
+    Random benchmark problem of a size class: a rectangular or L-shaped floor about a
+    third larger than the rooms, with a spanning tree of adjacencies plus a few extra ones.
+    Rooms get no max_expansion so the profile under test decides it.
+    """
+    rnd = random.Random(seed)
+    low, high = CLASS_ROOM_COUNTS[class_name]
+    count = rnd.randint(low, high)
+    sizes = [(rnd.randint(2, 6), rnd.randint(2, 6)) for _ in range(count)]
+
+    side = int((sum(w * h for w, h in sizes) * 4 / 3) ** 0.5) + 1
+    if rnd.random() < 0.5:
+        regions = [{'x': 0, 'y': 0, 'width': side, 'height': side}]
+    else:
+        # L shape of the same area: a wide bottom wing and a narrower top wing
+        wing = side * 2 // 3 + 1
+        regions = [{'x': 0, 'y': 0, 'width': side + wing // 2, 'height': wing},
+                   {'x': 0, 'y': wing, 'width': wing, 'height': side + wing // 2 - wing}]
+
+    floor_plan = floor_plan_class(regions)
+    for index, (width, height) in enumerate(sizes):
+        floor_plan.add_room(f'R{index}', width, height)
+    for index in range(1, count):
+        floor_plan.add_adjacency(f'R{index}', f'R{rnd.randrange(index)}')
+    for _ in range(count // 4):
+        first, second = rnd.sample(range(count), 2)
+        floor_plan.add_adjacency(f'R{first}', f'R{second}')
+    return floor_plan
+
+
+def evaluate_profile(problems, profile, seeds):
+    """Mean share of the objective's maximum reached, and mean seconds per solve"""
+    quality = 0.0
+    elapsed = 0.0
+    runs = 0
+    for problem in problems:
+        for seed in seeds:
+            random.seed(seed)
+            start = time.perf_counter()
+            placed = problem.place_rooms_with_constraints(profile=profile)
+            elapsed += time.perf_counter() - start
+            objective = problem.compile_objective()
+            if placed and objective.max_value > 0:
+                quality += objective.evaluate_rooms() / objective.max_value
+            runs += 1
+    return quality / runs, elapsed / runs
+
+
+def tune(floor_plan_class, classes=None, trials=12, problems_per_class=3, seeds=(0, 1), time_weight=0.05,
+         search_seed=0, log=None):
+    """
+    Random search over SEARCH_SPACE for every size class.
+
+    Each candidate profile solves the class's benchmark problems once per seed and is
+    scored by the mean share of the objective maximum it reaches minus time_weight per
+    second of mean solve time. DEFAULT_PROFILE is always among the candidates, so a tuned
+    profile never scores worse on the benchmark than the defaults. Returns
+    {class: {'profile', 'quality', 'seconds', 'score'}}.
+    """
+    rnd = random.Random(search_seed)
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    results = {}
+
+    for class_name in classes or [name for name, _, _ in SIZE_CLASSES]:
+        problems = [generate_problem(floor_plan_class, class_name, 1000 + index)
+                    for index in range(problems_per_class)]
+        candidates = [dict(DEFAULT_PROFILE)] + rnd.sample(grid, min(trials, len(grid)))
+
+        best = None
+        for profile in candidates:
+            quality, seconds = evaluate_profile(problems, profile, seeds)
+            score = quality - time_weight * seconds
+            if log:
+                log(f'{class_name} {profile} quality={quality:.3f} seconds={seconds:.3f} score={score:.3f}')
+            if best is None or score > best['score']:
+                best = {'profile': profile, 'quality': round(quality, 4), 'seconds': round(seconds, 4),
+                        'score': round(score, 4)}
+        results[class_name] = best
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune random solver parameters per problem size class')
+    parser.add_argument('--classes', nargs='*', help='size classes to tune (all by default)')
+    parser.add_argument('--trials', type=int, default=12)
+    parser.add_argument('--problems', type=int, default=3)
+    parser.add_argument('--seeds', type=int, default=2)
+    parser.add_argument('--time-weight', type=float, default=0.05)
+    parser.add_argument('--output', default=PROFILES_PATH)
+    args = parser.parse_args()
+
+    from app import FloorPlan
+
+    tuned = tune(FloorPlan, classes=args.classes, trials=args.trials, problems_per_class=args.problems,
+                 seeds=tuple(range(args.seeds)), time_weight=args.time_weight, log=print)
+
+    profiles = load_profiles(args.output)
+    profiles.update({name: result['profile'] for name, result in tuned.items()})
+    save_profiles(profiles, args.output)
+    print(json.dumps(tuned, indent=2))